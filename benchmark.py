@@ -0,0 +1,159 @@
+import argparse
+import datetime
+import json
+import pathlib
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+from main import (analyse_audio_stft, apply_time_dilation, distill_event_list, distill_timeline_matrix,
+                  note_velocities, prepare_note_energy, read_mono, remove_short_events, test_sets)
+
+OWN_PATH = pathlib.Path(__file__).parent
+
+
+def pipeline_stages(test_set):
+    """
+    the stages of the conversion of one test set, in order, as (name, function) pairs;
+    every function takes the result of the previous stage (None for the first one)
+    """
+    filename = OWN_PATH.joinpath(test_set.filename)
+    channel = 0
+
+    def load(_):
+        return read_mono(filename)
+
+    def stft(loaded):
+        fs, mono = loaded
+        hfreq, hmag, _ = analyse_audio_stft(fs, mono, OWN_PATH)
+        return mono.shape[0] / fs, hfreq, hmag
+
+    def note_mapping(analysed):
+        duration, hfreq, hmag = analysed
+        note_energy = prepare_note_energy(test_set, duration, hfreq, hmag)
+        return note_energy.time_step, note_velocities(note_energy, test_set)
+
+    def timeline(mapped):
+        time_step, velocities = mapped
+        return distill_timeline_matrix(time_step, velocities, channel, test_set.velocity_threshold)
+
+    def short_events(distilled):
+        return remove_short_events(distilled, test_set.min_duration)
+
+    def event_list(filtered):
+        return distill_event_list(filtered)
+
+    def time_dilation(events):
+        return apply_time_dilation(events, 3.0, 1.7)
+
+    return [("load", load), ("analyse_audio_stft", stft), ("note_mapping", note_mapping),
+            ("distill_timeline", timeline), ("remove_short_events", short_events),
+            ("distill_event_list", event_list), ("apply_time_dilation", time_dilation)]
+
+
+def run_stages(stages, trace_memory):
+    # one pass over all stages: per stage the wall time and, when tracing, the peak of the traced memory
+    results = {}
+    value = None
+    for name, stage in stages:
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = stage(value)
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results[name] = (elapsed, peak)
+    return results, value
+
+
+def benchmark_test_set(test_set, repeats):
+    """
+    :return: dict with, per stage, the best wall time of repeats runs and the peak traced memory of one
+             extra run (tracemalloc slows the code down, so it is not active during the timed runs)
+    """
+    stages = pipeline_stages(test_set)
+    times = {name: [] for name, _ in stages}
+    for _ in range(repeats):
+        results, event_list = run_stages(stages, trace_memory=False)
+        for name, (elapsed, _) in results.items():
+            times[name].append(elapsed)
+    memory, _ = run_stages(stages, trace_memory=True)
+    total = sum(min(stage_times) for stage_times in times.values())
+    return {"events": len(event_list),
+            "seconds": total,
+            "events_per_second": len(event_list) / total if total else None,
+            "stages": {name: {"seconds": min(times[name]), "peak_bytes": memory[name][1]} for name in times}}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=OWN_PATH, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=OWN_PATH,
+                               capture_output=True, text=True, check=True).stdout.strip() != ""
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def compare(results, baseline):
+    print(f"{'test set':<40} {'stage':<22} {'baseline s':>11} {'now s':>11} {'ratio':>7}")
+    for test_id, result in results["test_sets"].items():
+        if test_id not in baseline["test_sets"]:
+            continue
+        for name, stage in result["stages"].items():
+            before = baseline["test_sets"][test_id]["stages"].get(name)
+            if before is None:
+                continue
+            ratio = stage["seconds"] / before["seconds"] if before["seconds"] else float("nan")
+            print(f"{result['filename']:<40} {name:<22} {before['seconds']:>11.4f} {stage['seconds']:>11.4f} "
+                  f"{ratio:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="time every stage of the audio to midi conversion on the test sets")
+    parser.add_argument("--test-ids", type=int, nargs="*", default=sorted(test_sets),
+                        help="test sets to run (default: all); test sets whose input file is missing are skipped")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per test set, the best one is reported")
+    parser.add_argument("--output", type=pathlib.Path,
+                        help="json file to write (default: benchmarks/<git commit>.json)")
+    parser.add_argument("--compare", type=pathlib.Path, help="json file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    results = {"commit": commit,
+               "dirty": dirty,
+               "date": datetime.datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(),
+               "numpy": np.__version__,
+               "repeats": args.repeats,
+               "test_sets": {}}
+    for test_id in args.test_ids:
+        test_set = test_sets[test_id]
+        if not OWN_PATH.joinpath(test_set.filename).is_file():
+            print(f"{test_id}: skipping, {test_set.filename} not found")
+            continue
+        result = benchmark_test_set(test_set, args.repeats)
+        results["test_sets"][str(test_id)] = {"filename": test_set.filename, **result}
+        print(f"{test_id}: {test_set.filename}: {result['seconds']:.3f} s, {result['events']} events, "
+              f"{result['events_per_second']:.0f} events/s")
+
+    output = args.output or OWN_PATH.joinpath("benchmarks", f"{commit}{'-dirty' if dirty else ''}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
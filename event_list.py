@@ -0,0 +1,126 @@
+from collections import namedtuple
+
+import numpy as np
+
+Event = namedtuple("Event", "type channel time note velocity")
+
+EVENT_TYPES = ('nop', 'note_on', 'note_off')
+NOP, NOTE_ON, NOTE_OFF = range(len(EVENT_TYPES))
+
+
+def merge_positions(first, second):
+    """
+    stable merge of two sorted arrays
+
+    :param first: sorted array
+    :param second: sorted array; on equal values, elements of second come before those of first
+    :return: positions of the elements of first and of second in the merged array
+    """
+    first_positions = np.arange(len(first)) + np.searchsorted(second, first, side='right')
+    second_positions = np.arange(len(second)) + np.searchsorted(first, second, side='left')
+    return first_positions, second_positions
+
+
+class EventList(object):
+    """
+    columnar list of midi events sorted by time: one numpy array per Event field, with the event type
+    stored as an index into EVENT_TYPES. Indexing and iterating yield Event namedtuples.
+    """
+
+    __slots__ = ("type", "channel", "time", "note", "velocity")
+
+    def __init__(self, type, channel, time, note, velocity):
+        self.type = np.asarray(type, dtype=np.int8)
+        self.channel = np.asarray(channel, dtype=np.int16)
+        self.time = np.asarray(time, dtype=float)
+        self.note = np.asarray(note, dtype=np.int16)
+        self.velocity = np.asarray(velocity, dtype=np.int16)
+
+    @staticmethod
+    def empty():
+        return EventList([], [], [], [], [])
+
+    @staticmethod
+    def from_events(events):
+        """
+        :param events: iterable of Event, already sorted by time
+        :return: EventList holding the same events
+        """
+        events = list(events)
+        return EventList(type=[EVENT_TYPES.index(e.type) for e in events],
+                         channel=[e.channel for e in events],
+                         time=[e.time for e in events],
+                         note=[e.note for e in events],
+                         velocity=[e.velocity for e in events])
+
+    @staticmethod
+    def from_timeline(timeline):
+        """
+        one note_on and one note_off per timeline entry, sorted by time; at equal times
+        note_offs come before note_ons, so a note that is struck again is not cut off
+
+        timelines are ordered by the frame in which each note stops, so the starts always need a sort and the
+        stops do when a note was absent for some frames before its stop entry: this is O(n log n) (argsort,
+        then a searchsorted merge), not a linear merge of presorted streams
+
+        :param timeline: record array with start, stop, channel, note and velocity fields
+        :return: EventList
+        """
+        ons = timeline[np.argsort(timeline.start, kind='stable')]
+        # entries are written in the order their notes stop, so the note_offs usually need no sorting;
+        # only a note that was absent for some frames before its stop entry can end before earlier entries
+        offs = timeline
+        if np.any(timeline.stop[1:] < timeline.stop[:-1]):
+            offs = timeline[np.argsort(timeline.stop, kind='stable')]
+        on_positions, off_positions = merge_positions(ons.start, offs.stop)
+
+        size = 2 * len(timeline)
+        event_list = EventList(np.empty(size, dtype=np.int8), np.empty(size, dtype=np.int16), np.empty(size),
+                               np.empty(size, dtype=np.int16), np.empty(size, dtype=np.int16))
+        event_list.type[on_positions] = NOTE_ON
+        event_list.type[off_positions] = NOTE_OFF
+        event_list.channel[on_positions] = ons.channel
+        event_list.channel[off_positions] = offs.channel
+        event_list.time[on_positions] = ons.start
+        event_list.time[off_positions] = offs.stop
+        event_list.note[on_positions] = ons.note
+        event_list.note[off_positions] = offs.note
+        event_list.velocity[on_positions] = ons.velocity
+        event_list.velocity[off_positions] = 0
+        return event_list
+
+    @staticmethod
+    def concatenate(event_lists):
+        """
+        :param event_lists: iterable of EventList, each one starting after the previous one ends
+        :return: one EventList holding all events
+        """
+        event_lists = list(event_lists)
+        if not event_lists:
+            return EventList.empty()
+        return EventList(*(np.concatenate([getattr(e, field) for e in event_lists]) for field in EventList.__slots__))
+
+    def dilated(self, fixed_offset, time_dilation_factor):
+        """
+        :return: copy of the event list with every time t replaced by fixed_offset + t * time_dilation_factor
+        """
+        return EventList(self.type, self.channel, fixed_offset + self.time * time_dilation_factor, self.note,
+                         self.velocity)
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, index):
+        if isinstance(index, (slice, np.ndarray)):  # slice, boolean mask or index array
+            return EventList(*(getattr(self, field)[index] for field in EventList.__slots__))
+        return Event(type=EVENT_TYPES[self.type[index]],
+                     channel=int(self.channel[index]),
+                     time=float(self.time[index]),
+                     note=int(self.note[index]),
+                     velocity=int(self.velocity[index]))
+
+    def __iter__(self):
+        for type_index, channel, time, note, velocity in zip(self.type.tolist(), self.channel.tolist(),
+                                                             self.time.tolist(), self.note.tolist(),
+                                                             self.velocity.tolist()):
+            yield Event(type=EVENT_TYPES[type_index], channel=channel, time=time, note=note, velocity=velocity)
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import jack
+import numpy as np
+
+from jack_player import JackPlayer
+from main import STFT_SETTINGS, test_sets
+from streaming_converter import StreamingConverter
+
+SAMPLE_SIZE = 4  # jack audio ports carry 32 bit floats
+
+
+class JackCapture:
+    """
+    jack client with one audio input port that feeds a StreamingConverter
+
+    the process callback only copies the port buffer into a jack.RingBuffer; a worker thread reads it in
+    hop sized blocks, runs the analysis and passes the resulting events to sink (e.g. JackPlayer.send).
+    Can be tried without audio hardware on a dummy backend: jackd -d dummy
+    """
+
+    def __init__(self, test_set, sink=None, channel=0, max_amplitude_db=0.0, autoconnect='system:capture_1',
+                 buffer_seconds=2.0, settings=STFT_SETTINGS):
+        self.sink = sink
+        self.hop_size = settings.hop_size
+        self.overruns = 0  # number of port buffers dropped because the worker fell behind
+        self.first_frame = None  # jack frame time of the first captured sample
+        self.latencies = []  # per event: seconds between the frame that decided it and the moment it was emitted
+        self.finished = threading.Event()
+
+        self.client = jack.Client("audio_to_midi_capture")
+        self.converter = StreamingConverter(self.client.samplerate, test_set, channel=channel,
+                                            max_amplitude_db=max_amplitude_db, callback=self.emit, settings=settings)
+        self.ringbuffer = jack.RingBuffer(int(buffer_seconds * self.client.samplerate) * SAMPLE_SIZE)
+        self.inport = self.client.inports.register('audio_in')
+        self.client.set_process_callback(self.process)
+        self.client.set_shutdown_callback(self.shutdown)
+        self.worker = threading.Thread(target=self.work, daemon=True)
+        self.worker.start()
+        self.client.activate()
+        if autoconnect:
+            self.client.connect(autoconnect, 'audio_to_midi_capture:audio_in')
+
+    def close(self):
+        self.finished.set()
+        self.worker.join()
+        self.client.deactivate()
+        # analyse what the worker did not get to before ending the sound
+        remaining = self.ringbuffer.read_space // SAMPLE_SIZE * SAMPLE_SIZE
+        if remaining > 0:
+            self.converter.process(np.frombuffer(self.ringbuffer.read(remaining), dtype=np.float32))
+        self.converter.flush()
+        self.client.inports.clear()
+        self.client.close()
+
+    def process(self, frames):
+        # realtime thread: no locks, no allocations beyond the port buffer, never waits for the worker
+        if self.first_frame is None:
+            self.first_frame = self.client.last_frame_time
+        data = self.inport.get_buffer()
+        if self.ringbuffer.write_space >= len(data):
+            self.ringbuffer.write(data)
+        else:
+            self.overruns += 1
+
+    def work(self):
+        block_bytes = self.hop_size * SAMPLE_SIZE
+        poll_interval = self.hop_size / self.client.samplerate / 4
+        while not self.finished.is_set():
+            if self.ringbuffer.read_space < block_bytes:
+                time.sleep(poll_interval)
+                continue
+            block = np.frombuffer(self.ringbuffer.read(block_bytes), dtype=np.float32)
+            self.converter.process(block)  # events go to emit
+
+    def emit(self, event):
+        # called by the converter right after it decided frame converter.frame - 1; the event time itself is no
+        # measure of the delay, a note_off is dated at the end of the last loud frame, which can be long before
+        if self.first_frame is not None:
+            now = ((self.client.frame_time - self.first_frame) % 2 ** 32) / self.client.samplerate
+            self.latencies.append(now - (self.converter.frame - 1) * self.converter.time_step)
+        if self.sink is not None:
+            self.sink(event)
+
+    def latency_stats(self):
+        """
+        :return: dict with the number of events and the min, mean and max latency in seconds
+        """
+        if not self.latencies:
+            return {"events": 0, "min": None, "mean": None, "max": None}
+        latencies = np.asarray(self.latencies)
+        return {"events": len(latencies), "min": float(latencies.min()), "mean": float(latencies.mean()),
+                "max": float(latencies.max())}
+
+    def shutdown(self, status, reason):
+        print('JACK shutdown:', reason, status)
+        self.finished.set()
+
+
+def main():
+    # live voice to midi: capture from the first system input, play on the hardware synth through JackPlayer
+    player = JackPlayer()
+    capture = JackCapture(test_sets[3], sink=player.send)
+    try:
+        input("Listening, press enter to stop.")
+    finally:
+        capture.close()
+        player.close()
+    print(f"{capture.latency_stats() = }, {capture.overruns = }")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,19 @@
-import jack
+import numpy as np
+import queue
 import threading
+from array import array
+from bisect import bisect_left
+
+from event_list import NOP, NOTE_ON, EventList
+
+try:
+    import jack
+    CallbackExit = jack.CallbackExit
+except (ImportError, OSError):  # the python module or libjack is missing, only simulated clients can be used
+    jack = None
+
+    class CallbackExit(Exception):
+        pass
 
 NOTEON = 0x9 << 4
 NOTEOFF = 0x8 << 4
@@ -8,10 +22,40 @@ ALL_SOUND_OFF = 120
 CC = 0xB << 4
 
 
+def compile_event_list(event_list, fs):
+    """
+    :param event_list: EventList (or Events sorted by time) to play, the first event is played at sample 0
+    :param fs: sampling rate of the jack server
+    :return: array of absolute sample timestamps, memoryview of the 3 byte midi message of every timestamp,
+             and the sample timestamp of the last event (nop events only count for that last timestamp)
+    """
+    if not isinstance(event_list, EventList):
+        event_list = EventList.from_events(event_list)
+    # rounded per event from the absolute time, so the rounding errors do not add up over the list
+    timestamps = np.rint((event_list.time - event_list.time[0]) * fs).astype(np.int64)
+    keep = event_list.type != NOP
+    status = np.where((event_list.type == NOTE_ON) & (event_list.velocity > 0), NOTEON, NOTEOFF) + event_list.channel
+    messages = np.stack([status, event_list.note, event_list.velocity], axis=1)[keep].astype(np.uint8)
+    return array('q', timestamps[keep].tobytes()), memoryview(messages.tobytes()), int(timestamps[-1])
+
+
 class JackPlayer:
-    def __init__(self, event_list, autoconnect='ardour:MIDI 1/midi_in 1'):
+    def __init__(self, event_list=None, autoconnect='ardour:MIDI 1/midi_in 1', client=None):
+        # event_list=None starts an empty live player that only plays what is passed to send()
+        # client replaces the jack.Client, e.g. by a jack_simulator.SimulatedClient
         self.fs = 0
-        self.client = jack.Client("audio_to_midi")
+        self.position = 0  # sample timestamp of the start of the next block
+        self.index = 0  # index of the next timestamp to play
+        self.event = threading.Event()
+        self.live_events = queue.SimpleQueue()
+
+        if client is None and jack is None:
+            raise ImportError("the jack module (and libjack) is needed to play on a jack server")
+        self.client = client if client is not None else jack.Client("audio_to_midi")
+        self.timestamps = self.messages = self.end = None
+        if event_list is not None:
+            # compiled before activating, so process only slices precomputed buffers
+            self.timestamps, self.messages, self.end = compile_event_list(event_list, self.client.samplerate)
         self.outport = self.client.midi_outports.register('midi_out')
         self.client.set_process_callback(self.process)
         self.client.set_samplerate_callback(self.samplerate)
@@ -20,35 +64,42 @@ class JackPlayer:
         if autoconnect:
             self.client.connect('audio_to_midi:midi_out', autoconnect)
 
-        self.offset = 0
-        self.event = threading.Event()
-        self.event_list = iter(event_list)
-        self.msg = next(self.event_list)
-
     def close(self):
         self.client.midi_outports.clear()  # unregister all audio output ports
         self.client.deactivate()
         self.client.close()
 
+    def send(self, event):
+        """
+        live mode: queue an event to be written at the start of the next block
+        """
+        self.live_events.put(event)
+
+    def write(self, offset, event):
+        if event.type != 'nop':
+            status = NOTEON if event.type == 'note_on' and event.velocity > 0 else NOTEOFF
+            #print(event.type)
+            self.outport.write_midi_event(offset, [status + event.channel, event.note, event.velocity])
+
     def process(self, frames):
         self.outport.clear_buffer()
-        previous_time = self.msg.time
         while True:
-            if self.offset >= frames:
-                self.offset -= frames
-                return  # We'll take care of this in the next block ...
-            # Note: This may raise an exception:
-            if self.msg.type != 'nop':
-                status = NOTEON if self.msg.type == 'note_on' and self.msg.velocity > 0 else NOTEOFF
-                #print(self.msg.type)
-                self.outport.write_midi_event(self.offset, [status + self.msg.channel, self.msg.note, self.msg.velocity])
             try:
-                self.msg = next(self.event_list)
-            except StopIteration:
-                self.event.set()
-                raise jack.CallbackExit
-            self.offset += round((self.msg.time - previous_time) * self.fs)
-            previous_time = self.msg.time
+                self.write(0, self.live_events.get_nowait())
+            except queue.Empty:
+                break
+        if self.timestamps is None:
+            return
+        block_end = self.position + frames
+        next_index = bisect_left(self.timestamps, block_end, self.index)
+        for index in range(self.index, next_index):
+            self.outport.write_midi_event(self.timestamps[index] - self.position,
+                                          self.messages[3 * index:3 * index + 3])
+        self.index = next_index
+        self.position = block_end
+        if self.end < block_end:
+            self.event.set()
+            raise CallbackExit
 
     def wait_until_finished(self, timeout=None):
         return self.event.wait(timeout=timeout)
@@ -0,0 +1,148 @@
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from event_list import NOP, Event, EventList
+from jack_player import CallbackExit, JackPlayer
+
+SimulationResult = namedtuple("SimulationResult", "messages blocks process_ns")
+
+
+class SimulatedMidiPort(object):
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.messages = []  # (absolute sample time, midi bytes) of everything written
+
+    def clear_buffer(self):
+        pass
+
+    def write_midi_event(self, offset, data):
+        if not 0 <= offset < self.client.blocksize:
+            raise ValueError(f"midi event offset {offset} outside of the block of {self.client.blocksize} frames")
+        self.messages.append((self.client.frame_time + offset, bytes(data)))
+
+
+class SimulatedPorts(list):
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def register(self, name):
+        port = SimulatedMidiPort(self.client, name)
+        self.append(port)
+        return port
+
+
+class SimulatedClient(object):
+    """
+    stand-in for jack.Client that calls the process callback with a virtual clock instead of a jack server,
+    as fast as the callback allows
+
+    only what JackPlayer uses is implemented: midi out ports, the process/samplerate/shutdown callbacks,
+    activate, deactivate, connect and close
+    """
+
+    def __init__(self, samplerate=48000, blocksize=256):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.frame_time = 0  # sample time of the start of the current block
+        self.midi_outports = SimulatedPorts(self)
+        self.connections = []
+        self.process_callback = None
+
+    def set_process_callback(self, callback):
+        self.process_callback = callback
+
+    def set_samplerate_callback(self, callback):
+        callback(self.samplerate)
+
+    def set_shutdown_callback(self, callback):
+        pass
+
+    def activate(self):
+        pass
+
+    def deactivate(self):
+        pass
+
+    def close(self):
+        pass
+
+    def connect(self, source, destination):
+        self.connections.append((source, destination))
+
+    def run(self, max_blocks=None):
+        """
+        calls the process callback block after block until it raises CallbackExit or max_blocks is reached
+        :return: array with the duration of every process call in ns
+        """
+        process_ns = []
+        while max_blocks is None or len(process_ns) < max_blocks:
+            start = time.perf_counter_ns()
+            try:
+                self.process_callback(self.blocksize)
+            except CallbackExit:
+                process_ns.append(time.perf_counter_ns() - start)
+                break
+            process_ns.append(time.perf_counter_ns() - start)
+            self.frame_time += self.blocksize
+        return np.array(process_ns, dtype=np.int64)
+
+
+def simulate(event_list, samplerate=48000, blocksize=256, max_blocks=None):
+    """
+    plays an event list on a JackPlayer with a SimulatedClient
+    :return: SimulationResult with the (sample time, midi bytes) of every written message, the number of
+             processed blocks and the duration of every process call in ns
+    """
+    client = SimulatedClient(samplerate, blocksize)
+    player = JackPlayer(event_list, autoconnect=None, client=client)
+    process_ns = client.run(max_blocks)
+    player.close()
+    return SimulationResult(messages=player.outport.messages, blocks=len(process_ns), process_ns=process_ns)
+
+
+def timing_errors(event_list, messages, samplerate):
+    """
+    :return: per written message, its sample time minus the exact sample time of its event
+             (the first event of the list is played at sample 0)
+    """
+    if not isinstance(event_list, EventList):
+        event_list = EventList.from_events(event_list)
+    played = event_list.time[event_list.type != NOP]
+    exact = (played - event_list.time[0]) * samplerate
+    return np.array([sample_time for sample_time, _ in messages]) - exact
+
+
+def main():
+    parser = argparse.ArgumentParser(description="play a random event list on a simulated jack client")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--seconds", type=float, default=600.0)
+    parser.add_argument("--samplerate", type=int, default=48000)
+    parser.add_argument("--blocksize", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    times = np.sort(rng.uniform(0, args.seconds, args.events))
+    event_list = EventList(type=rng.integers(1, 3, args.events), channel=rng.integers(0, 16, args.events),
+                           time=times, note=rng.integers(0, 128, args.events),
+                           velocity=rng.integers(0, 128, args.events))
+    event_list = EventList.concatenate([event_list, EventList.from_events(
+        [Event(type='nop', channel=0, time=times[-1] + 0.02, note=0, velocity=0)])])
+
+    start = time.perf_counter()
+    result = simulate(event_list, args.samplerate, args.blocksize)
+    elapsed = time.perf_counter() - start
+    errors = timing_errors(event_list, result.messages, args.samplerate)
+    print(f"{result.blocks} blocks ({result.blocks * args.blocksize / args.samplerate:.1f} s of audio) "
+          f"in {elapsed:.2f} s")
+    print(f"process: mean {result.process_ns.mean() / 1e3:.1f} us, max {result.process_ns.max() / 1e3:.1f} us, "
+          f"budget {args.blocksize / args.samplerate * 1e6:.0f} us per block")
+    print(f"{len(result.messages)} messages, timing error within [{errors.min():.2f}, {errors.max():.2f}] samples")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import random
 
 import mido
+import numpy as np
 from scipy.io import wavfile
 import sys
 import math
@@ -9,15 +10,26 @@ from sms_tools.software.models import stft
 from scipy.signal import get_window
 from collections import namedtuple, defaultdict
 from statistics import mean, median
-from mapping import Mapping
-from jack_player import JackPlayer
-from mido import Message
+from mapping import LinExp, LinLin
+from event_list import Event, EventList
+from midi_export import export_midi_file
+from midi_scheduler import MidiScheduler
+from spectrogram_cache import SpectrogramCache
 import time
 from datetime import datetime
 import itertools
+import functools
+import concurrent.futures
 
 TimelineEntry = namedtuple("TimelineEntry", "start stop channel note velocity")
-Event = namedtuple("Event", "type channel time note velocity")
+Score = namedtuple("Score", "frames notes velocities channel")
+FrequencyAxis = namedtuple("FrequencyAxis", "fs fft_size")
+NoteLookup = namedtuple("NoteLookup", "notes bin_order note_offsets")
+NoteEnergy = namedtuple("NoteEnergy", "energy notes amplitudes time_step aggregation")
+AmplitudeSet = namedtuple("AmplitudeSet", "pages bits")
+StftSettings = namedtuple("StftSettings", "window fft_size window_size hop_size")
+AnalysisResult = namedtuple("AnalysisResult", "fs duration hfreq note_energy event_list timeline")
+TIMELINE_DTYPE = np.dtype([("start", float), ("stop", float), ("channel", int), ("note", int), ("velocity", int)])
 TestSetEntry = namedtuple("TestSetEntry",
                           "filename velocity_threshold min_duration max_note min_note min_amplitude_db transposition")
 
@@ -152,45 +164,110 @@ def dbamp(value):
     return 10 ** (value * 0.05)
 
 
+def frame_times(time_step, no_of_frames):
+    # accumulated like a running abs_time += time_step, so the times stay bit-identical to a per-frame loop
+    return np.concatenate(([0.0], np.cumsum(np.full(max(no_of_frames - 1, 0), time_step))))[:no_of_frames]
+
+
+@functools.lru_cache(maxsize=None)
+def note_lookup(fs, fft_size, transposition, min_note, max_note):
+    # notes[bin] is the midi note of fft bin (0 if outside [min_note, max_note]);
+    # bin_order[note_offsets[n]:note_offsets[n + 1]] are the bins that map to note n
+    spacing = fs / fft_size
+    notes = np.array([int(round_half_up(cpsmidi(freq))) + transposition if freq > 0 else 0 for
+                      freq in (i * spacing for i in range(fft_size // 2))], dtype=int)
+    notes[(notes < min_note) | (notes > max_note)] = 0
+    mapped_bins = np.nonzero(notes)[0]
+    bin_order = mapped_bins[np.argsort(notes[mapped_bins], kind='stable')]
+    note_offsets = np.searchsorted(notes[bin_order], np.arange(129))
+    for a in (notes, bin_order, note_offsets):
+        a.setflags(write=False)  # shared between all callers through the cache
+    return NoteLookup(notes=notes, bin_order=bin_order, note_offsets=note_offsets)
+
+
+def note_energy(hmag, lookup, aggregation='max', frames_per_block=1024):
+    # reduce a (frames x bins) spectrogram in dB to a (frames x 128) matrix with one column per midi note;
+    # 'max' keeps the loudest bin of each note, 'sum' adds the power of its bins; notes without bins get -inf
+    if aggregation not in ('max', 'sum'):
+        raise ValueError(f"unknown aggregation {aggregation!r}, expected 'max' or 'sum'")
+    energy = np.full((len(hmag), 128), -np.inf)
+    present = np.nonzero(lookup.note_offsets[:-1] < lookup.note_offsets[1:])[0]
+    if len(present) > 0:
+        starts = lookup.note_offsets[present]
+        # a block of frames at a time, so a memory-mapped spectrogram is never loaded as a whole
+        for first in range(0, len(hmag), frames_per_block):
+            block = slice(first, first + frames_per_block)
+            mags = np.asarray(hmag[block], dtype=float)[:, lookup.bin_order]
+            if aggregation == 'max':
+                energy[block, present] = np.maximum.reduceat(mags, starts, axis=1)
+            else:
+                energy[block, present] = 10 * np.log10(np.add.reduceat(10 ** (mags / 10), starts, axis=1))
+    return energy
+
+
 def distill_timeline(time_step, score, vel_threshold):
     freq_tracker = defaultdict(lambda: [])
-    abs_time = 0
     timeline = []
-    for line in score:
-        for event in line:
-            note = event[0]
-            if note > 0:
-                vel = event[1]
-                channel = event[2]
-                stop = vel < vel_threshold
-                go = not stop
-                if go:
-                    freq_tracker[note].append((abs_time, vel))
-                elif stop:
-                    if note in freq_tracker.keys():
-                        timeline.append(TimelineEntry(start=freq_tracker[note][0][0],
-                                                      stop=freq_tracker[note][-1][0] + time_step,
-                                                      channel=channel,
-                                                      note=note,
-                                                      velocity=int(
-                                                          round_half_up(mean([el[1] for el in freq_tracker[note]])))))
-                        del freq_tracker[note]
-
-        abs_time += time_step
+    times = frame_times(time_step, score.frames[-1] + 1 if len(score.frames) else 0).tolist()
+    channel = score.channel
+    for frame, note, vel in zip(score.frames.tolist(), score.notes.tolist(), score.velocities.tolist()):
+        if note > 0:
+            abs_time = times[frame]
+            stop = vel < vel_threshold
+            go = not stop
+            if go:
+                freq_tracker[note].append((abs_time, vel))
+            elif stop:
+                if note in freq_tracker.keys():
+                    timeline.append(TimelineEntry(start=freq_tracker[note][0][0],
+                                                  stop=freq_tracker[note][-1][0] + time_step,
+                                                  channel=channel,
+                                                  note=note,
+                                                  velocity=int(
+                                                      round_half_up(mean([el[1] for el in freq_tracker[note]])))))
+                    del freq_tracker[note]
 
     return timeline
 
 
+def distill_timeline_matrix(time_step, velocities, channel, vel_threshold):
+    # same timeline as distill_timeline for a (frames x 128) velocity matrix (0 = no entry for that note),
+    # computed per note column with run-length operations instead of a per-entry loop
+    notes, frames = np.nonzero(velocities.T)
+    keep = notes > 0
+    notes, frames = notes[keep], frames[keep]
+    vels = velocities.T[notes, frames]
+    go = vels >= vel_threshold
+    same_note_as_next = np.append(notes[1:] == notes[:-1], False)
+    go_continues = go & np.append(go[1:], False) & same_note_as_next
+    run_starts = np.nonzero(go & ~np.insert(go_continues[:-1], 0, False))[0]
+    run_ends = np.nonzero(go & ~go_continues)[0]
+    # a run of go entries is only written out when a stop entry for the same note follows it
+    closed = same_note_as_next[run_ends]
+    run_starts, run_ends = run_starts[closed], run_ends[closed]
+    summed_vels = np.concatenate(([0], np.cumsum(vels)))
+    mean_vels = (summed_vels[run_ends + 1] - summed_vels[run_starts]) / (run_ends - run_starts + 1)
+    times = frame_times(time_step, len(velocities))
+
+    timeline = np.empty(len(run_starts), dtype=TIMELINE_DTYPE).view(np.recarray)
+    timeline.start = times[frames[run_starts]]
+    timeline.stop = times[frames[run_ends]] + time_step
+    timeline.channel = channel
+    timeline.note = notes[run_starts]
+    timeline.velocity = np.floor(mean_vels + 0.5)
+    # entries are written when their stop entry is met: frame by frame, and by note within a frame
+    return timeline[np.lexsort((timeline.note, frames[run_ends + 1]))]
+
+
 def distill_event_list(timeline):
-    event_list = []
-    for event in timeline:
-        event_list.append(Event(type='note_on', channel=event.channel, time=event.start, note=event.note, velocity=event.velocity))
-        event_list.append(Event(type='note_off', channel=event.channel, time=event.stop, note=event.note, velocity=0))
-    event_list.sort(key=lambda el: el.time)
-    return event_list
+    if not isinstance(timeline, np.ndarray):
+        timeline = np.array([tuple(e) for e in timeline], dtype=TIMELINE_DTYPE).view(np.recarray)
+    return EventList.from_timeline(timeline)
 
 
 def remove_short_events(timeline, min_time):
+    if isinstance(timeline, np.ndarray):
+        return timeline[timeline.stop - timeline.start > min_time]
     result = []
     for e in timeline:
         if e.stop - e.start > min_time:
@@ -210,80 +287,244 @@ def make_odd(num):
     return num
 
 
-def analyse_audio_stft(fs, mono, own_path):
-    window = 'hamming'
-    fft_size = 8192
-    analysis_window_size = make_odd(int(fft_size / 2))
-    w = get_window(window, analysis_window_size)
-    hop_size = 2048
-    check_model = stft.stft(x=mono, w=w, N=fft_size, H=hop_size)
-    wavfile.write(own_path.joinpath("outputs/check_stft.wav"), fs, check_model)
+STFT_SETTINGS = StftSettings(window='hamming', fft_size=8192, window_size=make_odd(int(8192 / 2)), hop_size=2048)
 
-    hmag, hphase = stft.stftAnal(x=mono, w=w, N=fft_size, H=hop_size)
-    spacing = fs / fft_size
-    hfreq = [[i * spacing for i in range(fft_size // 2)] for _ in range(len(hmag))]
-    #print(f"frequency bin spacing = {spacing} Hz")
+
+def analyse_audio_stft(fs, mono, own_path, with_phase=False, check_resynthesis=False, settings=STFT_SETTINGS):
+    window = settings.window
+    fft_size = settings.fft_size
+    analysis_window_size = settings.window_size
+    w = get_window(window, analysis_window_size)
+    hop_size = settings.hop_size
+    if check_resynthesis:
+        check_model = stft.stft(x=mono, w=w, N=fft_size, H=hop_size)
+        wavfile.write(own_path.joinpath("outputs/check_stft.wav"), fs, check_model)
+
+    if with_phase:
+        hmag, hphase = stft.stftAnal(x=mono, w=w, N=fft_size, H=hop_size)
+    else:
+        # magnitude only: real-input FFT, no phase unwrapping, float32 output
+        hmag, hphase = stft.stftAnalMag(x=mono, w=w, N=fft_size, H=hop_size), None
+    hfreq = FrequencyAxis(fs=fs, fft_size=fft_size)
+    #print(f"frequency bin spacing = {fs / fft_size} Hz")
     return hfreq, hmag, hphase
 
 
-def convert_freq_mag_to_event_list(test_sets, test_id, channel, duration, hfreq, hmag):
-    if len(hfreq) > 0:
-        score = []
-        no_of_lines = len(hfreq)
-        time_step = duration / no_of_lines
-        max_amp = -1e10
-        min_amp = 1e10
-        for m in hmag:
-            relevant_amps = [el for el in m if el > test_sets[test_id].min_amplitude_db]
-            max_amp = max([max_amp, max(relevant_amps)])
-            min_amp = min([min_amp, min(relevant_amps)])
-        #print(f"{max_amp = }, {min_amp = }")
-
-        for f, m in zip(hfreq, hmag):
-            midinotes = [int(round_half_up(cpsmidi(freq))) + test_sets[test_id].transposition if freq > 0 else 0 for
-                         freq in f]
-            midinotes_filtered = [e if test_sets[test_id].min_note <= e <= test_sets[test_id].max_note else 0 for e in
-                                  midinotes]
-            print_stats(midinotes_filtered)
-            amps = [el if el >= test_sets[test_id].min_amplitude_db else min_amp for el in m]
-            mapped_amps = [Mapping.linlin(a, min_amp, max_amp, 0, 127) for a in amps]
-            rescaled_amps = [int(round_half_up(el)) for el in mapped_amps]
-            score.append(
-                [(note, amp, channel) for note, amp in zip(midinotes_filtered, rescaled_amps) if note != 0 and amp != 0])
-
-        timeline = distill_timeline(time_step, score, test_sets[test_id].velocity_threshold)
-        filtered_timeline = remove_short_events(timeline, test_sets[test_id].min_duration)
-        event_list = distill_event_list(filtered_timeline)
-        return event_list, filtered_timeline
+def prepare_note_energy(test_set, duration, hfreq, hmag, aggregation='max'):
+    # everything that does not depend on min_amplitude_db and velocity_threshold,
+    # so a threshold sweep only has to redo extract_event_list
+    lookup = note_lookup(hfreq.fs, hfreq.fft_size, test_set.transposition, test_set.min_note, test_set.max_note)
+    print_stats(lookup.notes)
+    if aggregation is None:
+        # one column per fft bin, several bins can carry the same note
+        notes = lookup.notes
+        energy = np.asarray(hmag, dtype=float)[:, :len(notes)]
+    else:
+        # one column per midi note
+        notes = np.arange(128)
+        energy = note_energy(hmag, lookup, aggregation)
+    return NoteEnergy(energy=energy,
+                      notes=notes,
+                      amplitudes=amplitude_set(hmag),
+                      time_step=duration / len(hmag),
+                      aggregation=aggregation)
+
+
+def float32_keys(values):
+    # unsigned integers that sort like the float32 values they are made from
+    bits = np.ascontiguousarray(values, dtype=np.float32).view(np.uint32)
+    return np.where(bits & np.uint32(0x80000000), ~bits, bits | np.uint32(0x80000000))
+
+
+def float32_from_key(key):
+    bits = np.uint32(key)
+    bits = bits & np.uint32(0x7fffffff) if bits & np.uint32(0x80000000) else ~bits
+    return bits.view(np.float32)
+
+
+def amplitude_set(hmag, frames_per_block=1024):
+    # which float32 values occur in a spectrogram, one bit per possible value: pages[i] are the upper 16 bits
+    # of the float32_keys, bits[i] the packed bitmap of their lower 16 bits; only pages in use are stored, so the
+    # size depends on the dB range of the spectrogram, not on its length (a few MB), unlike a sorted copy
+    # (a float64 spectrogram, e.g. from analyse_audio_stft(with_phase=True), is rounded to float32)
+    row_of_page = np.full(1 << 16, -1)
+    present = np.zeros((0, 1 << 16), dtype=bool)  # rows in the order the pages were first seen
+    for first in range(0, len(hmag), frames_per_block):
+        keys = float32_keys(np.ravel(hmag[first:first + frames_per_block]))
+        high = keys >> 16
+        new_pages = np.flatnonzero((np.bincount(high, minlength=1 << 16) > 0) & (row_of_page < 0))
+        if len(new_pages) > 0:
+            row_of_page[new_pages] = np.arange(len(present), len(present) + len(new_pages))
+            present = np.concatenate((present, np.zeros((len(new_pages), 1 << 16), dtype=bool)))
+        present.reshape(-1)[(row_of_page[high] << 16) | (keys & 0xffff)] = True
+    pages = np.flatnonzero(row_of_page >= 0)
+    return AmplitudeSet(pages=pages.astype(np.uint32), bits=np.packbits(present[row_of_page[pages]], axis=1))
+
+
+def min_above(amplitudes, threshold):
+    # smallest amplitude > threshold, comparing like python floats would; None if there is none
+    start = np.float32(threshold)
+    if float(start) <= threshold:
+        start = np.nextafter(start, np.float32(np.inf))
+    key = int(float32_keys(start))
+    for row in range(np.searchsorted(amplitudes.pages, key >> 16), len(amplitudes.pages)):
+        bits = np.unpackbits(amplitudes.bits[row])
+        if amplitudes.pages[row] == key >> 16:
+            bits[:key & 0xffff] = 0
+        present = np.flatnonzero(bits)
+        if len(present) > 0:
+            return float(float32_from_key((int(amplitudes.pages[row]) << 16) | int(present[0])))
+    return None
+
+
+def max_amplitude(amplitudes):
+    low = np.flatnonzero(np.unpackbits(amplitudes.bits[-1]))[-1]
+    return float(float32_from_key((int(amplitudes.pages[-1]) << 16) | int(low)))
+
+
+def scale_velocities(mags, min_amplitude_db, velocity_mapping):
+    # midi velocities (0..127) of a matrix of amplitudes in dB, amplitudes below min_amplitude_db give 0;
+    # velocity_mapping is a LinLin(min_amp, max_amp, 0, 127)
+    amps = np.where(mags >= min_amplitude_db, mags, velocity_mapping.in_min)
+    mapped_amps = velocity_mapping(amps)
+    return np.floor(mapped_amps + 0.5).astype(int)
+
+
+def note_velocities(note_energy, test_set):
+    # the amplitude range used for the velocity scaling: all amplitudes above min_amplitude_db
+    min_amp = min_above(note_energy.amplitudes, test_set.min_amplitude_db)
+    if min_amp is None:
+        raise ValueError(f"no amplitudes above min_amplitude_db = {test_set.min_amplitude_db}")
+    max_amp = max_amplitude(note_energy.amplitudes)
+    #print(f"{max_amp = }, {min_amp = }")
+    return scale_velocities(note_energy.energy, test_set.min_amplitude_db, LinLin(min_amp, max_amp, 0, 127))
+
+
+def extract_event_list(note_energy, test_set, channel):
+    rescaled_amps = note_velocities(note_energy, test_set)
+    if note_energy.aggregation is None:
+        midinotes = note_energy.notes
+        frames, columns = np.nonzero((midinotes != 0) & (rescaled_amps != 0))
+        score = Score(frames=frames, notes=midinotes[columns], velocities=rescaled_amps[frames, columns],
+                      channel=channel)
+        timeline = distill_timeline(note_energy.time_step, score, test_set.velocity_threshold)
+    else:
+        timeline = distill_timeline_matrix(note_energy.time_step, rescaled_amps, channel, test_set.velocity_threshold)
+    filtered_timeline = remove_short_events(timeline, test_set.min_duration)
+    event_list = distill_event_list(filtered_timeline)
+    return event_list, filtered_timeline
+
+
+def convert_freq_mag_to_event_list(test_sets, test_id, channel, duration, hfreq, hmag, aggregation='max'):
+    if len(hmag) > 0:
+        note_energy = prepare_note_energy(test_sets[test_id], duration, hfreq, hmag, aggregation)
+        return extract_event_list(note_energy, test_sets[test_id], channel)
 
     return []
 
 
+def read_mono(filename):
+    fs, audio = wavfile.read(filename)
+    if audio.ndim == 1:
+        mono = audio / (2 ** 15)
+    else:
+        mono = audio.sum(axis=1) / audio.shape[1] / (2 ** 15)
+    return fs, mono
+
+
+def read_mono_blocks(filename, block_size=STFT_SETTINGS.hop_size * 64):
+    # memory-maps the wav file and mixes it down to mono block by block, with the same scaling as read_mono
+    fs, audio = wavfile.read(filename, mmap=True)
+
+    def blocks():
+        for first in range(0, audio.shape[0], block_size):
+            block = audio[first:first + block_size]
+            if block.ndim == 1:
+                yield block / (2 ** 15)
+            else:
+                yield block.sum(axis=1) / block.shape[1] / (2 ** 15)
+
+    return fs, audio.shape[0], blocks()
+
+
+def stft_shape(no_of_samples, settings=STFT_SETTINGS):
+    # shape of the spectrogram of no_of_samples samples, as computed by stft.stftAnalMag
+    hm1 = (settings.window_size + 1) // 2
+    hm2 = settings.window_size // 2
+    return max(0, (no_of_samples + 2 * hm2 - 2 * hm1) // settings.hop_size + 1), settings.fft_size // 2 + 1
+
+
+def analyse_wav_stream(fs, no_of_samples, blocks, out=None, settings=STFT_SETTINGS):
+    # magnitude-only analysis of a sound delivered in blocks (see read_mono_blocks), written into out
+    # (e.g. a memory-mapped array of stft_shape(no_of_samples)) so only a few blocks are ever in memory
+    hmag = np.empty(stft_shape(no_of_samples, settings), dtype=np.float32) if out is None else out
+    w = get_window(settings.window, settings.window_size)
+    first = 0
+    for mag_block in stft.stftAnalMagStream(blocks, w=w, N=settings.fft_size, H=settings.hop_size):
+        hmag[first:first + len(mag_block)] = mag_block
+        first += len(mag_block)
+    return FrequencyAxis(fs=fs, fft_size=settings.fft_size), hmag
+
+
+def analyse_test_set(own_path, test_set, channel=None, cache=None):
+    filename = own_path.joinpath(test_set.filename)
+    fs, no_of_samples, blocks = read_mono_blocks(filename)
+    duration = no_of_samples / fs
+    hfreq = FrequencyAxis(fs=fs, fft_size=STFT_SETTINGS.fft_size)
+    hmag = None
+    if cache is not None:
+        key = SpectrogramCache.key(filename, magnitude_dtype="float32", **STFT_SETTINGS._asdict())
+        hmag = cache.load(key)
+    if hmag is None:
+        # with a cache, the spectrogram is written straight into its memory-mapped cache file
+        out = cache.create(stft_shape(no_of_samples), np.float32) if cache is not None else None
+        try:
+            hfreq, hmag = analyse_wav_stream(fs, no_of_samples, blocks, out)
+        except BaseException:
+            if out is not None:
+                cache.discard(out)
+            raise
+        if cache is not None:
+            # hmag stays usable: after the rename its memmap points at the cache entry, and even if another
+            # process evicts that entry, the mapping keeps the data until it is closed
+            cache.store(key, hmag)
+    note_energy = prepare_note_energy(test_set, duration, hfreq, hmag)
+    event_list, timeline = extract_event_list(note_energy, test_set, channel) if channel is not None else (None, None)
+    # the spectrogram itself is not returned: it would be pickled back to the parent process in full
+    return AnalysisResult(fs=fs, duration=duration, hfreq=hfreq, note_energy=note_energy, event_list=event_list,
+                          timeline=timeline)
+
+
+def analyse_test_sets(own_path, test_sets, test_ids, processes=None, extract_events=False, cache=None):
+    # analyse every test set in its own worker process (processes=None uses all cores, 1 stays in this process);
+    # results are keyed by test id in the order of test_ids, and when extract_events is set the
+    # event list of test_ids[i] is put on midi channel i
+    channels = [channel if extract_events else None for channel in range(len(test_ids))]
+    if processes == 1:
+        return {test_id: analyse_test_set(own_path, test_sets[test_id], channel, cache)
+                for test_id, channel in zip(test_ids, channels)}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(analyse_test_set, own_path, test_sets[test_id], channel, cache)
+                   for test_id, channel in zip(test_ids, channels)]
+        return {test_id: future.result() for test_id, future in zip(test_ids, futures)}
+
+
 def perform_event_list(event_list, use_direct_hardware_connection=True):
     if event_list:
         if use_direct_hardware_connection:
             outport = mido.open_output('INTEGRA-7:INTEGRA-7 MIDI 1 28:0')
-            previous_time = 0
-            for event in event_list:
-                new_time = event.time
-                if new_time == previous_time:
-                    #print(event.type, event.channel)
-                    outport.send(Message(event.type, channel=event.channel, note=event.note, velocity=event.velocity))
-                else:
-                    delta = new_time - previous_time
-                    #print(f"{new_time=}, {previous_time=}, {delta=}")
-                    previous_time = new_time
-                    time.sleep(delta)
-                    #print(event.type, event.channel)
-                    outport.send(Message(event.type, channel=event.channel, note=event.note, velocity=event.velocity))
-
+            scheduler = MidiScheduler(outport, event_list)
+            scheduler.play()
+            print(f"{scheduler.timing_stats() = }")
             time.sleep(1.0)
             outport.reset()
         else:
-            new_event_list = event_list[:]
+            # imported here, so the conversion functions of this module can be used without jack installed
+            from jack_player import JackPlayer
             # add an extra nop event to prevent last notes from keeping playing
             extra_time = event_list[-1].time + 0.02
-            new_event_list.append(Event(type='nop', channel=event_list[-1].channel, time=extra_time, note=0, velocity=0))
+            new_event_list = EventList.concatenate([event_list, EventList.from_events(
+                [Event(type='nop', channel=event_list[-1].channel, time=extra_time, note=0, velocity=0)])])
             j = JackPlayer(new_event_list, 'ardour:MIDI 1/midi_in 1')
             j.wait_until_finished()
             j.close()
@@ -293,34 +534,21 @@ def time_to_ticks(elapsed_time, resolution, tempo,):
 
 
 def apply_time_dilation(event_list, fixed_offset, time_dilation_factor):
-    result = []
-    event_list_copy = event_list[:]
-    for event in event_list_copy:
-        result.append(Event(type=event.type,
-                            channel=event.channel,
-                            time=fixed_offset + event.time*time_dilation_factor,
-                            note=event.note,
-                            velocity=event.velocity))
-    return result
+    return event_list.dilated(fixed_offset, time_dilation_factor)
 
 def main():
     own_path = pathlib.Path(sys.argv[0]).parent
     test_ids = [3, 1]
 
-    mono_per_test_id = {}
-    hfreq_per_test_id = {}
-    hmag_per_test_id = {}
     ideal_min_amp_per_test_id = {}
     ideal_velocity_threshold_per_test_id = {}
-    event_list = []
+    event_list_chunks = []
+    last_event_time = None
+    # analysed once, in parallel; every sweep step below only re-applies the thresholds
+    # spectrograms are cached on disk, invalidate with "python spectrogram_cache.py clear"
+    cache = SpectrogramCache(own_path.joinpath("cache", "spectrograms"))
+    analysis_per_test_id = analyse_test_sets(own_path, test_sets, test_ids, cache=cache)
     for test_id in test_ids:
-        fs, audio = wavfile.read(own_path.joinpath(test_sets[test_id].filename))
-        if audio.ndim == 1:
-            mono = audio / (2 ** 15)
-        else:
-            mono = audio.sum(axis=1) / audio.shape[1] / (2 ** 15)
-        mono_per_test_id[test_id] = mono[:]
-        hfreq_per_test_id[test_id], hmag_per_test_id[test_id], hphase = analyse_audio_stft(fs, mono_per_test_id[test_id], own_path)
         ideal_min_amp_per_test_id[test_id] = test_sets[test_id].min_amplitude_db
         ideal_velocity_threshold_per_test_id[test_id] = test_sets[test_id].velocity_threshold
 
@@ -331,37 +559,45 @@ def main():
     timeline_per_test_id = {}
     fixed_offset = 0
     all_offsets = [fixed_offset]
+    # the ranges of the sweep are fixed, so their mappings are compiled once
+    time_dilation_mapping = LinExp(0, steps * repeats - 1, 4, ideal_time_dilation_factor)
+    min_amp_mapping_per_test_id = {test_id: LinLin(0, steps - 1, ideal_min_amp_per_test_id[test_id] / 2,
+                                                   ideal_min_amp_per_test_id[test_id]) for test_id in test_ids}
+    velocity_threshold_mapping_per_test_id = {test_id: LinLin(0, steps - 1, 120,
+                                                              ideal_velocity_threshold_per_test_id[test_id])
+                                              for test_id in test_ids}
+    pause_mapping = LinLin(0, steps + 2, 3.0, 1.0)
     itersteps = itertools.chain(range(steps), itertools.repeat(19, 2))
     for index, i in enumerate(itersteps):
         for repeat in range(repeats):
-            time_dilation_factor = Mapping.linexp(i * repeats + repeat, 0, steps * repeats - 1, 4,
-                                                  ideal_time_dilation_factor)
+            time_dilation_factor = time_dilation_mapping(i * repeats + repeat)
 
             #print(f"{time_dilation_factor = }")
             for channel, test_id in enumerate(test_ids):
                 if repeat == 0:
-                    test_sets[test_id] = test_sets[test_id]._replace(min_amplitude_db = Mapping.linlin(i, 0, steps-1,
-                                                                                                       ideal_min_amp_per_test_id[test_id]/2,
-                                                                                                       ideal_min_amp_per_test_id[test_id]))
-                    test_sets[test_id] = test_sets[test_id]._replace(velocity_threshold = Mapping.linlin(i, 0, steps-1, 120,
-                                                                                                         ideal_velocity_threshold_per_test_id[test_id]))
-                    event_list_per_test_id[test_id], timeline_per_test_id[test_id] = convert_freq_mag_to_event_list(test_sets, test_id,
-                                                                                                                    channel,
-                                                                                                                    mono_per_test_id[test_id].shape[0] / fs,
-                                                                                                                    hfreq_per_test_id[test_id],
-                                                                                                                    hmag_per_test_id[test_id])
-
-                event_list.extend(apply_time_dilation(event_list_per_test_id[test_id], fixed_offset, time_dilation_factor))
-                fixed_offset = event_list[-1].time + 0.02
+                    test_sets[test_id] = test_sets[test_id]._replace(min_amplitude_db = min_amp_mapping_per_test_id[test_id](i))
+                    test_sets[test_id] = test_sets[test_id]._replace(velocity_threshold = velocity_threshold_mapping_per_test_id[test_id](i))
+                    event_list_per_test_id[test_id], timeline_per_test_id[test_id] = extract_event_list(analysis_per_test_id[test_id].note_energy,
+                                                                                                        test_sets[test_id],
+                                                                                                        channel)
+
+                event_list_chunks.append(apply_time_dilation(event_list_per_test_id[test_id], fixed_offset, time_dilation_factor))
+                if event_list_chunks[-1]:
+                    last_event_time = event_list_chunks[-1].time[-1]
+                fixed_offset = last_event_time + 0.02
                 all_offsets.append(fixed_offset)
                 print(".", end="")
 
-        fixed_offset += Mapping.linlin(index, 0, steps + 2, 3.0, 1.0) # sleep
+        fixed_offset += pause_mapping(index) # sleep
 
+    event_list = EventList.concatenate(event_list_chunks)
     start_time = datetime.now()
 
+    own_path.joinpath("outputs").mkdir(exist_ok=True)
     with open(own_path.joinpath("outputs", "offsets.txt"), "w") as f:
         f.write(",".join([f"{el}" for el in all_offsets]))
+    export_midi_file(event_list, own_path.joinpath("outputs", "sweep.mid"), track_per_channel=True,
+                     track_names={channel: test_sets[test_id].filename for channel, test_id in enumerate(test_ids)})
 
     print(".")
     input("Start recording then press enter to continue.")
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 
 class Mapping(object):
     """
@@ -116,7 +118,7 @@ class Mapping(object):
         :return: mapping from value in  exponential input range to value in exponential output range
         (extrapolating if possible)
         """
-        if out_min:
+        if out_min == 0:
             return None
         if value == 0:
             return None
@@ -131,4 +133,222 @@ class Mapping(object):
         if clip:
             output = Mapping.clip_value(output, out_min, out_max)
         return output
-    
\ No newline at end of file
+
+    @staticmethod
+    def clip_array(values, minimum, maximum):
+        """
+        clip_value for numpy arrays (minimum and maximum broadcast against values, NaN stays NaN)
+        """
+        return np.clip(values, np.minimum(minimum, maximum), np.maximum(minimum, maximum))
+
+    @staticmethod
+    def linlin_array(values, in_min, in_max, out_min, out_max, clip=True):
+        """
+        linlin for numpy arrays: values and all range arguments broadcast against each other,
+        the result is a float array with the same values as linlin on every element
+        """
+        values, in_min, in_max, out_min, out_max = np.broadcast_arrays(values, in_min, in_max, out_min, out_max)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            output = ((out_min + out_max) + (out_max - out_min) * (
+                    (2 * values - (in_min + in_max)) / (in_max - in_min))) / 2.0
+        if clip:
+            output = Mapping.clip_array(output, out_min, out_max)
+        return np.where(in_min == in_max, out_max, output).astype(float)
+
+    @staticmethod
+    def linexp_array(values, in_min, in_max, out_min, out_max, clip=True):
+        """
+        linexp for numpy arrays; NaN where linexp returns None (or where math.pow would raise)
+        """
+        values, in_min, in_max, out_min, out_max = np.broadcast_arrays(values, in_min, in_max, out_min, out_max)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            base = out_max / out_min
+            exponent = (values - in_min) / (in_max - in_min)
+            output = np.power(base, exponent) * out_min
+        if clip:
+            output = Mapping.clip_array(output, out_min, out_max)
+        degenerate = in_min == in_max  # linexp returns out_max there, whatever base and exponent are
+        output = np.where(degenerate, out_max, output)
+        undefined = (out_min == 0) | (~degenerate & (base == 0) & (exponent < 0))
+        return np.where(undefined, np.nan, output).astype(float)
+
+    @staticmethod
+    def explin_array(values, in_min, in_max, out_min, out_max, clip=True):
+        """
+        explin for numpy arrays; NaN where explin returns None (or where it would divide by zero).
+        np.log may differ from math.log in the last bit, so results can differ from explin in the last digits
+        """
+        values, in_min, in_max, out_min, out_max = np.broadcast_arrays(values, in_min, in_max, out_min, out_max)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = values / in_min
+            range_ratio = in_max / in_min
+            output = np.log(ratio) / np.log(range_ratio) * (out_max - out_min) + out_min
+        if clip:
+            output = Mapping.clip_array(output, out_min, out_max)
+        undefined = (in_min == 0) | (ratio <= 0) | (range_ratio <= 0) | (range_ratio == 1)
+        return np.where(undefined, np.nan, output).astype(float)
+
+    @staticmethod
+    def expexp_array(values, in_min, in_max, out_min, out_max, clip=True):
+        """
+        expexp for numpy arrays; NaN where expexp returns None (or where math.log or math.pow would raise).
+        np.log may differ from math.log in the last bit, so results can differ from expexp in the last digits
+        """
+        values, in_min, in_max, out_min, out_max = np.broadcast_arrays(values, in_min, in_max, out_min, out_max)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = values / in_min
+            range_ratio = in_max / in_min
+            base = out_max / out_min
+            exponent = np.log(ratio) / np.log(range_ratio)
+            output = np.power(base, exponent) * out_min
+        if clip:
+            output = Mapping.clip_array(output, out_min, out_max)
+        undefined = (out_min == 0) | (values == 0) | (ratio <= 0) | (in_min == 0) | ((in_max - in_min) <= 0)
+        undefined |= (range_ratio <= 0) | ((base == 0) & (exponent < 0))
+        return np.where(undefined, np.nan, output).astype(float)
+
+
+class Mapper(object):
+    """
+    mapping from [in_min, in_max] to [out_min, out_max] with its coefficients computed once; calling it maps
+    a scalar (like the Mapping functions, None where they return None) or a numpy array (NaN instead of None)
+    """
+
+    def __init__(self, in_min, in_max, out_min, out_max, clip=True):
+        self.in_min = in_min
+        self.in_max = in_max
+        self.out_min = out_min
+        self.out_max = out_max
+        self.clip = clip
+        self.lowest = min(out_min, out_max)
+        self.highest = max(out_min, out_max)
+
+    def clipped(self, output):
+        if not self.clip:
+            return output
+        if isinstance(output, np.ndarray):
+            return np.clip(output, self.lowest, self.highest)
+        if output < self.lowest:
+            return self.lowest
+        elif output > self.highest:
+            return self.highest
+        return output
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.in_min!r}, {self.in_max!r}, {self.out_min!r}, {self.out_max!r}, " \
+               f"clip={self.clip!r})"
+
+
+class LinLin(Mapper):
+    """
+    precompiled Mapping.linlin, e.g. LinLin(0, 1, 10, 20)(0.3) = 13
+    """
+
+    def __init__(self, in_min, in_max, out_min, out_max, clip=True):
+        super().__init__(in_min, in_max, out_min, out_max, clip)
+        self.constant = in_min == in_max
+        self.out_sum = out_min + out_max
+        self.out_span = out_max - out_min
+        self.in_sum = in_min + in_max
+        self.in_span = float(in_max - in_min)
+
+    def __call__(self, value):
+        if self.constant:
+            return np.full(np.shape(value), self.out_max, dtype=float) if isinstance(value, np.ndarray) \
+                else self.out_max
+        return self.clipped((self.out_sum + self.out_span * ((2 * value - self.in_sum) / self.in_span)) / 2.0)
+
+    def inverse(self):
+        return LinLin(self.out_min, self.out_max, self.in_min, self.in_max, self.clip)
+
+
+class LinExp(Mapper):
+    """
+    precompiled Mapping.linexp
+    """
+
+    def __init__(self, in_min, in_max, out_min, out_max, clip=True):
+        if out_min == 0:
+            raise ValueError("exponential output range cannot start at 0")
+        super().__init__(in_min, in_max, out_min, out_max, clip)
+        self.constant = in_min == in_max
+        self.ratio = out_max / out_min
+        self.in_span = in_max - in_min if not self.constant else 1
+
+    def __call__(self, value):
+        if isinstance(value, np.ndarray):
+            if self.constant:
+                return np.full(value.shape, self.out_max, dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                exponent = (value - self.in_min) / self.in_span
+                output = np.power(self.ratio, exponent) * self.out_min
+            output = self.clipped(output)
+            return np.where((self.ratio == 0) & (exponent < 0), np.nan, output)
+        if self.constant:
+            return self.out_max
+        return self.clipped(math.pow(self.ratio, (value - self.in_min) / self.in_span) * self.out_min)
+
+    def inverse(self):
+        return ExpLin(self.out_min, self.out_max, self.in_min, self.in_max, self.clip)
+
+
+class ExpLin(Mapper):
+    """
+    precompiled Mapping.explin
+    """
+
+    def __init__(self, in_min, in_max, out_min, out_max, clip=True):
+        if in_min == 0 or in_max / in_min <= 0 or in_max == in_min:
+            raise ValueError("exponential input range must be non-empty and cannot contain 0")
+        super().__init__(in_min, in_max, out_min, out_max, clip)
+        self.log_range = math.log(in_max / in_min)
+        self.array_log_range = np.log(in_max / in_min)  # np.log for arrays, as explin_array, see ExpExp
+        self.out_span = out_max - out_min
+
+    def __call__(self, value):
+        if isinstance(value, np.ndarray):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = value / self.in_min
+                output = np.log(ratio) / self.array_log_range * self.out_span + self.out_min
+            return np.where(ratio <= 0, np.nan, self.clipped(output))
+        if value / self.in_min <= 0:
+            return None
+        return self.clipped(math.log(value / self.in_min) / self.log_range * self.out_span + self.out_min)
+
+    def inverse(self):
+        return LinExp(self.out_min, self.out_max, self.in_min, self.in_max, self.clip)
+
+
+class ExpExp(Mapper):
+    """
+    precompiled Mapping.expexp
+    """
+
+    def __init__(self, in_min, in_max, out_min, out_max, clip=True):
+        if out_min == 0:
+            raise ValueError("exponential output range cannot start at 0")
+        if in_min == 0 or in_max - in_min <= 0:
+            raise ValueError("exponential input range must be increasing and cannot start at 0")
+        super().__init__(in_min, in_max, out_min, out_max, clip)
+        self.ratio = out_max / out_min
+        # the exponent is a quotient of two logs of the same library, math.log for scalars as in expexp and
+        # np.log for arrays as in expexp_array: mixing them (np.log(3) / math.log(3) != 1) turns the exact
+        # integer exponents a negative ratio needs into NaN
+        self.log_range = math.log(in_max / in_min)
+        self.array_log_range = np.log(in_max / in_min)
+
+    def __call__(self, value):
+        if isinstance(value, np.ndarray):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = value / self.in_min
+                exponent = np.log(ratio) / self.array_log_range
+                output = np.power(self.ratio, exponent) * self.out_min
+            # where math.pow would raise for a zero base with a negative exponent, the array gets NaN
+            undefined = (value == 0) | (ratio <= 0) | ((self.ratio == 0) & (exponent < 0))
+            return np.where(undefined, np.nan, self.clipped(output))
+        if value == 0 or value / self.in_min <= 0:
+            return None
+        return self.clipped(math.pow(self.ratio, math.log(value / self.in_min) / self.log_range) * self.out_min)
+
+    def inverse(self):
+        return ExpExp(self.out_min, self.out_max, self.in_min, self.in_max, self.clip)
@@ -0,0 +1,63 @@
+import numpy as np
+from mido import Message, MetaMessage, MidiFile, MidiTrack, bpm2tempo
+
+from event_list import EVENT_TYPES, NOP, EventList
+
+
+def absolute_ticks(times, ticks_per_beat, tempo):
+    """
+    :param times: array of event times in seconds
+    :param ticks_per_beat: resolution of the midi file
+    :param tempo: microseconds per beat
+    :return: array of event times in ticks, each rounded from its own absolute time
+    """
+    return np.rint(np.asarray(times) * (1e6 / tempo) * ticks_per_beat).astype(np.int64)
+
+
+def make_track(event_list, ticks, name=None, tempo=None):
+    # delta ticks are differences of absolute ticks, so rounding errors do not accumulate along the track
+    track = MidiTrack()
+    if name is not None:
+        track.append(MetaMessage('track_name', name=name, time=0))
+    if tempo is not None:
+        track.append(MetaMessage('set_tempo', tempo=tempo, time=0))
+    deltas = np.diff(ticks, prepend=0).tolist()
+    for type_index, channel, note, velocity, delta in zip(event_list.type.tolist(), event_list.channel.tolist(),
+                                                          event_list.note.tolist(), event_list.velocity.tolist(),
+                                                          deltas):
+        track.append(Message(EVENT_TYPES[type_index], channel=channel, note=note, velocity=velocity, time=delta))
+    track.append(MetaMessage('end_of_track', time=0))
+    return track
+
+
+def export_midi_file(event_list, filename, track_per_channel=False, ticks_per_beat=960, tempo=bpm2tempo(120),
+                     track_names=None):
+    """
+    writes an event list to a standard midi file
+
+    :param event_list: EventList (or Events sorted by time), times in seconds
+    :param filename: path of the .mid file to write
+    :param track_per_channel: write a type 1 file with a tempo track and one track per midi channel,
+                              instead of a type 0 file with a single track
+    :param ticks_per_beat: resolution of the midi file
+    :param tempo: microseconds per beat
+    :param track_names: optional dict from channel to track name (e.g. the input file of that channel)
+    :return: the written mido.MidiFile
+    """
+    if not isinstance(event_list, EventList):
+        event_list = EventList.from_events(event_list)
+    event_list = event_list[event_list.type != NOP]
+    ticks = absolute_ticks(event_list.time, ticks_per_beat, tempo)
+    if not track_per_channel:
+        midi_file = MidiFile(type=0, ticks_per_beat=ticks_per_beat)
+        midi_file.tracks.append(make_track(event_list, ticks, tempo=tempo))
+    else:
+        midi_file = MidiFile(type=1, ticks_per_beat=ticks_per_beat)
+        midi_file.tracks.append(make_track(EventList.empty(), np.zeros(0, dtype=np.int64), tempo=tempo))
+        track_names = track_names or {}
+        for channel in np.unique(event_list.channel).tolist():
+            in_channel = event_list.channel == channel
+            midi_file.tracks.append(make_track(event_list[in_channel], ticks[in_channel],
+                                               name=track_names.get(channel, f"channel {channel + 1}")))
+    midi_file.save(filename)
+    return midi_file
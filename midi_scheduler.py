@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+from mido import Message
+
+from event_list import EVENT_TYPES, NOP, EventList
+
+
+class MidiScheduler(object):
+    """
+    plays an event list on a mido output port against absolute deadlines
+
+    every deadline is start + event time on the time.perf_counter_ns clock, so lateness of one send does not
+    shift the following ones. The messages are built before playback starts, grouped per timestamp and sent
+    in one go; the thread sleeps until spin_ns before a deadline and busy-waits the rest
+    """
+
+    def __init__(self, outport, event_list, spin_ns=2_000_000):
+        """
+        :param outport: opened mido output port
+        :param event_list: EventList (or Events sorted by time); times are seconds since the start of playback
+        :param spin_ns: how long before a deadline to stop sleeping and start busy-waiting
+        """
+        if not isinstance(event_list, EventList):
+            event_list = EventList.from_events(event_list)
+        self.outport = outport
+        self.spin_ns = spin_ns
+        keep = event_list.type != NOP
+        deadlines = np.rint(event_list.time[keep] * 1e9).astype(np.int64)
+        messages = [Message(EVENT_TYPES[type_index], channel=channel, note=note, velocity=velocity)
+                    for type_index, channel, note, velocity in zip(event_list.type[keep].tolist(),
+                                                                   event_list.channel[keep].tolist(),
+                                                                   event_list.note[keep].tolist(),
+                                                                   event_list.velocity[keep].tolist())]
+        group_starts = np.flatnonzero(np.diff(deadlines, prepend=-1))
+        group_ends = np.append(group_starts[1:], len(deadlines))
+        self.groups = [(deadline, messages[first:last]) for deadline, first, last in
+                       zip(deadlines[group_starts].tolist(), group_starts.tolist(), group_ends.tolist())]
+        self.errors_ns = np.zeros(len(self.groups), dtype=np.int64)  # per group: send time - deadline
+
+    def play(self):
+        start = time.perf_counter_ns()
+        for index, (deadline, messages) in enumerate(self.groups):
+            deadline += start
+            remaining = deadline - time.perf_counter_ns()
+            if remaining > self.spin_ns:
+                time.sleep((remaining - self.spin_ns) / 1e9)
+            while time.perf_counter_ns() < deadline:
+                pass
+            self.errors_ns[index] = time.perf_counter_ns() - deadline
+            for message in messages:
+                self.outport.send(message)
+
+    def timing_stats(self):
+        """
+        :return: dict with the number of timestamps and the mean, standard deviation and max lateness in ms
+        """
+        if not len(self.errors_ns):
+            return {"timestamps": 0, "mean_ms": None, "std_ms": None, "max_ms": None}
+        errors_ms = self.errors_ns / 1e6
+        return {"timestamps": len(errors_ms), "mean_ms": float(errors_ms.mean()), "std_ms": float(errors_ms.std()),
+                "max_ms": float(errors_ms.max())}
@@ -75,6 +75,56 @@ def dftAnal(x, w, N):
 	pX = np.unwrap(np.angle(X[:hN]))                        # unwrapped phase spectrum of positive frequencies
 	return mX, pX
 
+def dftAnalFrames(xFrames, w, N):
+	"""
+	Analysis of a batch of signal frames using the discrete Fourier transform
+	xFrames: input frames (one frame per row), w: analysis window, N: FFT size
+	returns mX, pX: magnitude and phase spectra (one spectrum per row), same values as dftAnal on each frame
+	"""
+
+	if not(UF.isPower2(N)):                                 # raise error if N not a power of two
+		raise ValueError("FFT size (N) is not a power of 2")
+
+	if (w.size > N):                                        # raise error if window size bigger than fft size
+		raise ValueError("Window size (M) is bigger than FFT size")
+
+	hN = (N//2)+1                                           # size of positive spectrum, it includes sample 0
+	hM1 = (w.size+1)//2                                     # half analysis window size by rounding
+	hM2 = w.size//2                                         # half analysis window size by floor
+	fftbuffer = np.zeros((xFrames.shape[0], N))             # initialize buffer for FFT, one row per frame
+	w = w / sum(w)                                          # normalize analysis window
+	xw = xFrames*w                                          # window all input frames
+	fftbuffer[:,:hM1] = xw[:,hM2:]                          # zero-phase window in fftbuffer
+	fftbuffer[:,N-hM2:] = xw[:,:hM2]
+	X = fft(fftbuffer, axis=1)[:,:hN]                       # compute FFT of all frames, keep positive side
+	absX = abs(X)                                           # compute absolute value of positive side
+	absX[absX<np.finfo(float).eps] = np.finfo(float).eps    # if zeros add epsilon to handle log
+	mX = 20 * np.log10(absX)                                # magnitude spectra of positive frequencies in dB
+	X.real[np.abs(X.real) < tol] = 0.0                      # for phase calculation set to 0 the small values
+	X.imag[np.abs(X.imag) < tol] = 0.0                      # for phase calculation set to 0 the small values
+	pX = np.unwrap(np.angle(X), axis=1)                     # unwrapped phase spectra of positive frequencies
+	return mX, pX
+
+def dftAnalMagFrames(xFrames, w, N, dtype=np.float32):
+	"""
+	Magnitude-only analysis of a batch of signal frames using a real-input FFT
+	xFrames: input frames (one frame per row), w: analysis window, N: FFT size
+	dtype: type of the returned magnitudes
+	returns mX: magnitude spectra in dB (one spectrum per row)
+	"""
+
+	if not(UF.isPower2(N)):                                 # raise error if N not a power of two
+		raise ValueError("FFT size (N) is not a power of 2")
+
+	if (w.size > N):                                        # raise error if window size bigger than fft size
+		raise ValueError("Window size (M) is bigger than FFT size")
+
+	w = w / sum(w)                                          # normalize analysis window
+	absX = abs(np.fft.rfft(xFrames*w, N, axis=1))           # no zero-phase buffer needed, it only changes the phase
+	absX[absX<np.finfo(float).eps] = np.finfo(float).eps    # if zeros add epsilon to handle log
+	mX = 20 * np.log10(absX)                                # magnitude spectra of positive frequencies in dB
+	return mX.astype(dtype, copy=False)
+
 def dftSynth(mX, pX, M):
 	"""
 	Synthesis of a signal using the discrete Fourier transform
@@ -34,28 +34,21 @@ def f0Detection(x, fs, w, N, H, t, minf0, maxf0, f0et):
 	x = np.append(x,np.zeros(hM1))                             # add zeros at the end to analyze last sample
 	pin = hM1                                                  # init sound pointer in middle of anal window          
 	pend = x.size - hM1                                        # last sample to start a frame
-	fftbuffer = np.zeros(N)                                    # initialize buffer for FFT
 	w = w / sum(w)                                             # normalize analysis window
-	f0 = []                                                    # initialize f0 output
+	nFrames = max(0, (pend-pin-1)//H + 1)                      # number of frames, pin takes the values hM1, hM1+H, ... < pend
+	f0 = np.zeros(nFrames)                                     # initialize f0 output
 	f0t = 0                                                    # initialize f0 track
 	f0stable = 0                                               # initialize f0 stable
-	while pin<pend:             
-		x1 = x[pin-hM1:pin+hM2]                                  # select frame
-		mX, pX = DFT.dftAnal(x1, w, N)                           # compute dft           
-		ploc = UF.peakDetection(mX, t)                           # detect peak locations   
-		iploc, ipmag, ipphase = UF.peakInterp(mX, pX, ploc)      # refine peak values
-		ipfreq = fs * iploc/N                                    # convert locations to Hez
+	for l, (ipfreq, ipmag, ipphase) in enumerate(SM.spectralPeaks(x, fs, w, N, H, t, nFrames)):
 		f0t = UF.f0Twm(ipfreq, ipmag, f0et, minf0, maxf0, f0stable)  # find f0
 		if ((f0stable==0)&(f0t>0)) \
 				or ((f0stable>0)&(np.abs(f0stable-f0t)<f0stable/5.0)):
 			f0stable = f0t                                         # consider a stable f0 if it is close to the previous one
 		else:
 			f0stable = 0
-		f0 = np.append(f0, f0t)                                  # add f0 to output array
-		pin += H                                                 # advance sound pointer
+		f0[l] = f0t                                              # add f0 to output array
 	return f0
 
-
 def harmonicDetection(pfreq, pmag, pphase, f0, nH, hfreqp, fs, harmDevSlope=0.01):
 	"""
 	Detection of the harmonics of a frame from a set of spectral peaks using f0
@@ -123,13 +116,9 @@ def harmonicModel(x, fs, w, N, t, nH, minf0, maxf0, f0et):
 	hfreqp = []
 	f0t = 0
 	f0stable = 0
-	while pin<pend:             
+	nFrames = max(0, (pend-pin-1)//H + 1)                   # number of frames, pin takes the values pin, pin+H, ... < pend
+	for ipfreq, ipmag, ipphase in SM.spectralPeaks(x[pin-hM1:], fs, w, N, H, t, nFrames): # peaks of all frames
 	#-----analysis-----             
-		x1 = x[pin-hM1:pin+hM2]                               # select frame
-		mX, pX = DFT.dftAnal(x1, w, N)                        # compute dft
-		ploc = UF.peakDetection(mX, t)                        # detect peak locations     
-		iploc, ipmag, ipphase = UF.peakInterp(mX, pX, ploc)   # refine peak values
-		ipfreq = fs * iploc/N
 		f0t = UF.f0Twm(ipfreq, ipmag, f0et, minf0, maxf0, f0stable)  # find f0
 		if ((f0stable==0)&(f0t>0)) \
 				or ((f0stable>0)&(np.abs(f0stable-f0t)<f0stable/5.0)):
@@ -169,17 +158,15 @@ def harmonicModelAnal(x, fs, w, N, H, t, nH, minf0, maxf0, f0et, harmDevSlope=0.
 	x = np.append(x,np.zeros(hM2))                          # add zeros at the end to analyze last sample
 	pin = hM1                                               # init sound pointer in middle of anal window          
 	pend = x.size - hM1                                     # last sample to start a frame
-	fftbuffer = np.zeros(N)                                 # initialize buffer for FFT
 	w = w / sum(w)                                          # normalize analysis window
+	nFrames = max(0, (pend-pin)//H + 1)                     # number of frames, pin takes the values hM1, hM1+H, ... <= pend
+	xhfreq = np.zeros((nFrames, nH))                        # initialize output harmonic tracks
+	xhmag = np.zeros((nFrames, nH))
+	xhphase = np.zeros((nFrames, nH))
 	hfreqp = []                                             # initialize harmonic frequencies of previous frame
 	f0t = 0                                                 # initialize f0 track
 	f0stable = 0                                            # initialize f0 stable
-	while pin<=pend:           
-		x1 = x[pin-hM1:pin+hM2]                               # select frame
-		mX, pX = DFT.dftAnal(x1, w, N)                        # compute dft            
-		ploc = UF.peakDetection(mX, t)                        # detect peak locations   
-		iploc, ipmag, ipphase = UF.peakInterp(mX, pX, ploc)   # refine peak values
-		ipfreq = fs * iploc/N                                 # convert locations to Hz
+	for l, (ipfreq, ipmag, ipphase) in enumerate(SM.spectralPeaks(x, fs, w, N, H, t, nFrames)):
 		f0t = UF.f0Twm(ipfreq, ipmag, f0et, minf0, maxf0, f0stable)  # find f0
 		if ((f0stable==0)&(f0t>0)) \
 				or ((f0stable>0)&(np.abs(f0stable-f0t)<f0stable/5.0)):
@@ -188,15 +175,9 @@ def harmonicModelAnal(x, fs, w, N, H, t, nH, minf0, maxf0, f0et, harmDevSlope=0.
 			f0stable = 0
 		hfreq, hmag, hphase = harmonicDetection(ipfreq, ipmag, ipphase, f0t, nH, hfreqp, fs, harmDevSlope) # find harmonics
 		hfreqp = hfreq
-		if pin == hM1:                                        # first frame
-			xhfreq = np.array([hfreq])
-			xhmag = np.array([hmag])
-			xhphase = np.array([hphase])
-		else:                                                 # next frames
-			xhfreq = np.vstack((xhfreq,np.array([hfreq])))
-			xhmag = np.vstack((xhmag, np.array([hmag])))
-			xhphase = np.vstack((xhphase, np.array([hphase])))
-		pin += H                                              # advance sound pointer
+		xhfreq[l] = hfreq                                     # save harmonics to the output arrays
+		xhmag[l] = hmag
+		xhphase[l] = hphase
 	xhfreq = SM.cleaningSineTracks(xhfreq, round(fs*minSineDur/H))     # delete tracks shorter than minSineDur
 	return xhfreq, xhmag, xhphase
 
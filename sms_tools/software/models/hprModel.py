@@ -74,13 +74,9 @@ def hprModel(x, fs, w, N, t, nH, minf0, maxf0, f0et):
 	hfreqp = []
 	f0t = 0
 	f0stable = 0
-	while pin<pend:  
+	nFrames = max(0, (pend-pin-1)//H + 1)                   # number of frames, pin takes the values pin, pin+H, ... < pend
+	for ipfreq, ipmag, ipphase in SM.spectralPeaks(x[pin-hM1:], fs, w, N, H, t, nFrames): # peaks of all frames
 	#-----analysis-----             
-		x1 = x[pin-hM1:pin+hM2]                                     # select frame
-		mX, pX = DFT.dftAnal(x1, w, N)                              # compute dft
-		ploc = UF.peakDetection(mX, t)                              # find peaks 
-		iploc, ipmag, ipphase = UF.peakInterp(mX, pX, ploc)         # refine peak values
-		ipfreq = fs * iploc/N                                       # convert locations to Hz
 		f0t = UF.f0Twm(ipfreq, ipmag, f0et, minf0, maxf0, f0stable) # find f0
 		if ((f0stable==0)&(f0t>0)) \
 			or ((f0stable>0)&(np.abs(f0stable-f0t)<f0stable/5.0)):
@@ -24,7 +24,7 @@ def sineTracking(pfreq, pmag, pphase, tfreq, freqDevOffset=20, freqDevSlope=0.01
 	pindexes = np.array(np.nonzero(pfreq), dtype=np.int)[0]    # indexes of current peaks
 	incomingTracks = np.array(np.nonzero(tfreq), dtype=np.int)[0] # indexes of incoming tracks
 	newTracks = np.zeros(tfreq.size, dtype=np.int) -1           # initialize to -1 new tracks
-	magOrder = np.argsort(-pmag[pindexes])                      # order current peaks by magnitude
+	magOrder = np.argsort(-pmag[pindexes], kind='stable')       # order current peaks by magnitude, equal ones in order
 	pfreqt = np.copy(pfreq)                                     # copy current peaks to temporary array
 	pmagt = np.copy(pmag)                                       # copy current peaks to temporary array
 	pphaset = np.copy(pphase)                                   # copy current peaks to temporary array
@@ -51,7 +51,7 @@ def sineTracking(pfreq, pmag, pphase, tfreq, freqDevOffset=20, freqDevSlope=0.01
 
 	# create new tracks from non used peaks
 	emptyt = np.array(np.nonzero(tfreq == 0), dtype=np.int)[0]      # indexes of empty incoming tracks
-	peaksleft = np.argsort(-pmagt)                                  # sort left peaks by magnitude
+	peaksleft = np.argsort(-pmagt, kind='stable')                   # sort left peaks by magnitude, equal ones in order
 	if ((peaksleft.size > 0) & (emptyt.size >= peaksleft.size)):    # fill empty tracks
 			tfreqn[emptyt[:peaksleft.size]] = pfreqt[peaksleft]
 			tmagn[emptyt[:peaksleft.size]] = pmagt[peaksleft]
@@ -65,33 +65,71 @@ def sineTracking(pfreq, pmag, pphase, tfreq, freqDevOffset=20, freqDevSlope=0.01
 			tphasen = np.append(tphasen, pphaset[peaksleft[emptyt.size:]])
 	return tfreqn, tmagn, tphasen
 
+def spectralPeakBatches(x, fs, w, N, H, t, nFrames, B=128):
+	"""
+	Spectral peaks of consecutive frames of a sound, with the FFTs of B frames computed in one batch
+	x: input sound (already padded), the first frame is x[:w.size]; fs: sampling rate, w: analysis window,
+	N: FFT size, H: hop size, t: threshold in negative dB, nFrames: number of frames
+	yields ipfreq, ipmag, ipphase, offsets: peak frequencies, magnitudes and phases of up to B frames,
+	those of frame l of the batch are ipfreq[offsets[l]:offsets[l+1]]
+	"""
+
+	xFrames = UF.frameView(x, w.size, H, nFrames)          # all frames of the input sound, without copying
+	for l in range(0, nFrames, B):                          # analyse B frames at a time to bound the FFT buffers
+		mXs, pXs = DFT.dftAnalFrames(xFrames[l:l+B], w, N)
+		ploc, offsets = UF.peakDetectionFrames(mXs, t)          # detect locations of peaks of all frames
+		iploc, ipmag, ipphase = UF.peakInterpFrames(mXs, pXs, ploc, offsets) # refine peak values by interpolation
+		ipfreq = fs*iploc/N                                   # convert peak locations to Hertz
+		yield ipfreq, ipmag, ipphase, offsets
+
+def spectralPeaks(x, fs, w, N, H, t, nFrames, B=128):
+	"""
+	Spectral peaks of consecutive frames of a sound, with the FFTs of B frames computed in one batch
+	x: input sound (already padded), the first frame is x[:w.size]; fs: sampling rate, w: analysis window,
+	N: FFT size, H: hop size, t: threshold in negative dB, nFrames: number of frames
+	yields ipfreq, ipmag, ipphase: peak frequencies, magnitudes and phases of each frame,
+	same values as dftAnal, peakDetection and peakInterp on each frame
+	"""
+
+	for ipfreq, ipmag, ipphase, offsets in spectralPeakBatches(x, fs, w, N, H, t, nFrames, B):
+		for begin, end in zip(offsets[:-1], offsets[1:]):
+			yield ipfreq[begin:end], ipmag[begin:end], ipphase[begin:end]
+
+def sineTrackingFrames(pfreq, pmag, pphase, offsets, tfreq, maxnSines, freqDevOffset=20, freqDevSlope=0.01):
+	"""
+	Tracking sinusoids over a sequence of frames, python version of the cython function UF_C.sineTracks
+	pfreq, pmag, pphase: peaks of all frames, those of frame l are pfreq[offsets[l]:offsets[l+1]]
+	tfreq: frequencies of incoming tracks before the first frame (only the first maxnSines are continued)
+	maxnSines: maximum number of tracks
+	freqDevOffset: minimum frequency deviation at 0Hz, freqDevSlope: slope increase of minimum frequency deviation
+	returns xtfreq, xtmag, xtphase: frequencies, magnitudes and phases of the tracks of every frame
+	"""
+
+	nFrames = len(offsets) - 1                              # number of frames
+	tfreq = np.asarray(tfreq, dtype=float)[:maxnSines]      # incoming tracks, limited like those of the next frames
+	xtfreq = np.zeros((nFrames, maxnSines))                 # initialize output sine tracks
+	xtmag = np.zeros((nFrames, maxnSines))
+	xtphase = np.zeros((nFrames, maxnSines))
+	for l, (begin, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+		tfreq, tmag, tphase = sineTracking(pfreq[begin:end], pmag[begin:end], pphase[begin:end], tfreq,
+		                                   freqDevOffset, freqDevSlope)
+		tfreq = np.resize(tfreq, min(maxnSines, tfreq.size))  # limit number of tracks to maxnSines
+		tmag = np.resize(tmag, min(maxnSines, tmag.size))     # limit number of tracks to maxnSines
+		tphase = np.resize(tphase, min(maxnSines, tphase.size)) # limit number of tracks to maxnSines
+		xtfreq[l,:tfreq.size] = tfreq                         # save track frequencies to the output arrays
+		xtmag[l,:tmag.size] = tmag                            # save track magnitudes to the output arrays
+		xtphase[l,:tphase.size] = tphase                      # save track phases to the output arrays
+	return xtfreq, xtmag, xtphase
+
 def cleaningSineTracks(tfreq, minTrackLength=3):
 	"""
 	Delete short fragments of a collection of sinusoidal tracks 
-	tfreq: frequency of tracks
+	tfreq: frequency of tracks, modified in place
 	minTrackLength: minimum duration of tracks in number of frames
 	returns tfreqn: output frequency of tracks
 	"""
 
-	if tfreq.shape[1] == 0:                                 # if no tracks return input
-		return tfreq
-	nFrames = tfreq[:,0].size                               # number of frames
-	nTracks = tfreq[0,:].size                               # number of tracks in a frame
-	for t in range(nTracks):                                # iterate over all tracks
-		trackFreqs = tfreq[:,t]                               # frequencies of one track
-		trackBegs = np.nonzero((trackFreqs[:nFrames-1] <= 0)  # begining of track contours
-								& (trackFreqs[1:]>0))[0] + 1
-		if trackFreqs[0]>0:
-			trackBegs = np.insert(trackBegs, 0, 0)
-		trackEnds = np.nonzero((trackFreqs[:nFrames-1] > 0)   # end of track contours
-								& (trackFreqs[1:] <=0))[0] + 1
-		if trackFreqs[nFrames-1]>0:
-			trackEnds = np.append(trackEnds, nFrames-1)
-		trackLengths = 1 + trackEnds - trackBegs              # lengths of trach contours
-		for i,j in zip(trackBegs, trackLengths):              # delete short track contours
-			if j <= minTrackLength:
-				trackFreqs[i:i+j] = 0
-	return tfreq
+	return UF.cleaningTracks(tfreq, minTrackLength)        # all tracks in one vectorized pass
 	
 
 def sineModel(x, fs, w, N, t):
@@ -117,13 +155,9 @@ def sineModel(x, fs, w, N, t):
 	bh = blackmanharris(Ns)                                 # blackmanharris window
 	bh = bh / sum(bh)                                       # normalized blackmanharris window
 	sw[hNs-H:hNs+H] = sw[hNs-H:hNs+H] / bh[hNs-H:hNs+H]     # normalized synthesis window
-	while pin<pend:                                         # while input sound pointer is within sound 
+	nFrames = max(0, (pend-pin-1)//H + 1)                   # number of frames, pin takes the values pin, pin+H, ... < pend
+	for ipfreq, ipmag, ipphase in spectralPeaks(x[pin-hM1:], fs, w, N, H, t, nFrames): # peaks of all frames
 	#-----analysis-----             
-		x1 = x[pin-hM1:pin+hM2]                               # select frame
-		mX, pX = DFT.dftAnal(x1, w, N)                        # compute dft
-		ploc = UF.peakDetection(mX, t)                        # detect locations of peaks
-		iploc, ipmag, ipphase = UF.peakInterp(mX, pX, ploc)   # refine peak values by interpolation
-		ipfreq = fs*iploc/float(N)                            # convert peak locations to Hertz
 	#-----synthesis-----
 		Y = UF.genSpecSines(ipfreq, ipmag, ipphase, Ns, fs)   # generate sines in the spectrum         
 		fftbuffer = np.real(ifft(Y))                          # compute inverse FFT
@@ -133,12 +167,13 @@ def sineModel(x, fs, w, N, t):
 		pin += H                                              # advance sound pointer
 	return y
 
-def sineModelAnal(x, fs, w, N, H, t, maxnSines = 100, minSineDur=.01, freqDevOffset=20, freqDevSlope=0.01):
+def sineModelAnal(x, fs, w, N, H, t, maxnSines = 100, minSineDur=.01, freqDevOffset=20, freqDevSlope=0.01, dtype=np.float64):
 	"""
 	Analysis of a sound using the sinusoidal model with sine tracking
 	x: input array sound, w: analysis window, N: size of complex spectrum, H: hop-size, t: threshold in negative dB
 	maxnSines: maximum number of sines per frame, minSineDur: minimum duration of sines in seconds
 	freqDevOffset: minimum frequency deviation at 0Hz, freqDevSlope: slope increase of minimum frequency deviation
+	dtype: type of the returned arrays (the tracking itself is always done in float64)
 	returns xtfreq, xtmag, xtphase: frequencies, magnitudes and phases of sinusoidal tracks
 	"""
 	
@@ -152,33 +187,24 @@ def sineModelAnal(x, fs, w, N, H, t, maxnSines = 100, minSineDur=.01, freqDevOff
 	pin = hM1                                               # initialize sound pointer in middle of analysis window       
 	pend = x.size - hM1                                     # last sample to start a frame
 	w = w / sum(w)                                          # normalize analysis window
+	nFrames = max(0, (pend-pin-1)//H + 1)                   # number of frames, pin takes the values hM1, hM1+H, ... < pend
+	xtfreq = np.zeros((nFrames, maxnSines), dtype=dtype)    # initialize output sine tracks
+	xtmag = np.zeros((nFrames, maxnSines), dtype=dtype)
+	xtphase = np.zeros((nFrames, maxnSines), dtype=dtype)
+	try:
+		sineTracks = UF.UF_C.sineTracks                       # compiled tracking of many frames at once
+	except AttributeError:                                  # cython module missing or built without sineTracks
+		sineTracks = sineTrackingFrames
 	tfreq = np.array([])
-	while pin<pend:                                         # while input sound pointer is within sound            
-		x1 = x[pin-hM1:pin+hM2]                               # select frame
-		mX, pX = DFT.dftAnal(x1, w, N)                        # compute dft
-		ploc = UF.peakDetection(mX, t)                        # detect locations of peaks
-		iploc, ipmag, ipphase = UF.peakInterp(mX, pX, ploc)   # refine peak values by interpolation
-		ipfreq = fs*iploc/float(N)                            # convert peak locations to Hertz
+	l = 0
+	for ipfreq, ipmag, ipphase, offsets in spectralPeakBatches(x, fs, w, N, H, t, nFrames): # peaks of all frames
 		# perform sinusoidal tracking by adding peaks to trajectories
-		tfreq, tmag, tphase = sineTracking(ipfreq, ipmag, ipphase, tfreq, freqDevOffset, freqDevSlope)
-		tfreq = np.resize(tfreq, min(maxnSines, tfreq.size))  # limit number of tracks to maxnSines
-		tmag = np.resize(tmag, min(maxnSines, tmag.size))     # limit number of tracks to maxnSines
-		tphase = np.resize(tphase, min(maxnSines, tphase.size)) # limit number of tracks to maxnSines
-		jtfreq = np.zeros(maxnSines)                          # temporary output array
-		jtmag = np.zeros(maxnSines)                           # temporary output array
-		jtphase = np.zeros(maxnSines)                         # temporary output array   
-		jtfreq[:tfreq.size]=tfreq                             # save track frequencies to temporary array
-		jtmag[:tmag.size]=tmag                                # save track magnitudes to temporary array
-		jtphase[:tphase.size]=tphase                          # save track magnitudes to temporary array
-		if pin == hM1:                                        # if first frame initialize output sine tracks
-			xtfreq = jtfreq 
-			xtmag = jtmag
-			xtphase = jtphase
-		else:                                                 # rest of frames append values to sine tracks
-			xtfreq = np.vstack((xtfreq, jtfreq))
-			xtmag = np.vstack((xtmag, jtmag))
-			xtphase = np.vstack((xtphase, jtphase))
-		pin += H
+		tfreqs, tmags, tphases = sineTracks(ipfreq, ipmag, ipphase, offsets, tfreq, maxnSines, freqDevOffset, freqDevSlope)
+		xtfreq[l:l+tfreqs.shape[0]] = tfreqs                  # save tracks to the output arrays
+		xtmag[l:l+tmags.shape[0]] = tmags
+		xtphase[l:l+tphases.shape[0]] = tphases
+		l += tfreqs.shape[0]
+		tfreq = tfreqs[-1]                                    # incoming tracks of the next batch
 	# delete sine tracks shorter than minSineDur
 	xtfreq = cleaningSineTracks(xtfreq, round(fs*minSineDur/H))  
 	return xtfreq, xtmag, xtphase
@@ -67,13 +67,9 @@ def sprModel(x, fs, w, N, t):
 	bh = bh / sum(bh)                                             # normalize synthesis window
 	wr = bh                                                       # window for residual
 	sw[hNs-H:hNs+H] = sw[hNs-H:hNs+H] / bh[hNs-H:hNs+H]
-	while pin<pend:  
+	nFrames = max(0, (pend-pin-1)//H + 1)                   # number of frames, pin takes the values pin, pin+H, ... < pend
+	for ipfreq, ipmag, ipphase in SM.spectralPeaks(x[pin-hM1:], fs, w, N, H, t, nFrames): # peaks of all frames
   #-----analysis-----             
-		x1 = x[pin-hM1:pin+hM2]                                     # select frame
-		mX, pX = DFT.dftAnal(x1, w, N)                              # compute dft
-		ploc = UF.peakDetection(mX, t)                              # find peaks 
-		iploc, ipmag, ipphase = UF.peakInterp(mX, pX, ploc)         # refine peak values		iploc, ipmag, ipphase = UF.peakInterp(mX, pX, ploc)          # refine peak values
-		ipfreq = fs*iploc/float(N)                                  # convert peak locations to Hertz
 		ri = pin-hNs-1                                              # input sound pointer for residual analysis
 		xw2 = x[ri:ri+Ns]*wr                                        # window the input sound                                       
 		fftbuffer = np.zeros(Ns)                                    # reset buffer
@@ -4,6 +4,7 @@
 import numpy as np
 import math
 from . import dftModel as DFT
+from . import utilFunctions as UF
 
 def stft(x, w, N, H):
 	"""
@@ -36,10 +37,11 @@ def stft(x, w, N, H):
 	y = np.delete(y, range(y.size-hM1, y.size))    # delete half of the last window which as added in stftAnal
 	return y
 
-def stftAnal(x, w, N, H) :
+def stftAnal(x, w, N, H, B=128) :
 	"""
 	Analysis of a sound using the short-time Fourier transform
 	x: input array sound, w: analysis window, N: FFT size, H: hop size
+	B: number of frames analysed together in one batched FFT
 	returns xmX, xpX: magnitude and phase spectra
 	"""
 	if (H <= 0):                                   # raise error if hop size 0 or negative
@@ -53,18 +55,76 @@ def stftAnal(x, w, N, H) :
 	pin = hM1                                       # initialize sound pointer in middle of analysis window       
 	pend = x.size-hM1                               # last sample to start a frame
 	w = w / sum(w)                                  # normalize analysis window
-	xmX = []                                       # Initialise empty list for mX
-	xpX = []                                       # Initialise empty list for pX
-	while pin<=pend:                                # while sound pointer is smaller than last sample      
-		x1 = x[pin-hM1:pin+hM2]                     # select one frame of input sound
-		mX, pX = DFT.dftAnal(x1, w, N)              # compute dft
-		xmX.append(np.array(mX))                    # Append output to list
-		xpX.append(np.array(pX))
-		pin += H                                    # advance sound pointer
-	xmX = np.array(xmX)                             # Convert to numpy array
-	xpX = np.array(xpX)
+	nFrames = max(0, (pend-pin)//H + 1)             # number of frames, pin takes the values hM1, hM1+H, ... <= pend
+	xFrames = UF.frameView(x, M, H, nFrames)        # all frames of the input sound, without copying
+	xmX = np.empty((nFrames, N//2+1))               # initialize output magnitude spectra
+	xpX = np.empty((nFrames, N//2+1))               # initialize output phase spectra
+	for l in range(0, nFrames, B):                  # analyse B frames at a time to bound the FFT buffers
+		xmX[l:l+B], xpX[l:l+B] = DFT.dftAnalFrames(xFrames[l:l+B], w, N)
 	return xmX, xpX
 
+def stftAnalMag(x, w, N, H, B=128, dtype=np.float32) :
+	"""
+	Magnitude-only analysis of a sound using the short-time Fourier transform
+	x: input array sound, w: analysis window, N: FFT size, H: hop size
+	B: number of frames analysed together in one batched FFT, dtype: type of the returned magnitudes
+	returns xmX: magnitude spectra in dB, with the same frames as stftAnal
+	"""
+	if (H <= 0):                                   # raise error if hop size 0 or negative
+		raise ValueError("Hop size (H) smaller or equal to 0")
+
+	M = w.size                                      # size of analysis window
+	hM1 = (M+1)//2                                  # half analysis window size by rounding
+	hM2 = M//2                                      # half analysis window size by floor
+	x = np.append(np.zeros(hM2),x)                  # add zeros at beginning to center first window at sample 0
+	x = np.append(x,np.zeros(hM2))                  # add zeros at the end to analyze last sample
+	pin = hM1                                       # initialize sound pointer in middle of analysis window
+	pend = x.size-hM1                               # last sample to start a frame
+	w = w / sum(w)                                  # normalize analysis window
+	nFrames = max(0, (pend-pin)//H + 1)             # number of frames, pin takes the values hM1, hM1+H, ... <= pend
+	xFrames = UF.frameView(x, M, H, nFrames)        # all frames of the input sound, without copying
+	xmX = np.empty((nFrames, N//2+1), dtype=dtype)  # initialize output magnitude spectra
+	for l in range(0, nFrames, B):                  # analyse B frames at a time to bound the FFT buffers
+		xmX[l:l+B] = DFT.dftAnalMagFrames(xFrames[l:l+B], w, N, dtype)
+	return xmX
+
+def stftAnalMagStream(xBlocks, w, N, H, B=128, dtype=np.float32) :
+	"""
+	Magnitude-only analysis of a sound delivered as a sequence of blocks, with bounded memory
+	xBlocks: iterable of consecutive input sound blocks (of any size), w: analysis window, N: FFT size, H: hop size
+	B: number of frames analysed together in one batched FFT, dtype: type of the returned magnitudes
+	yields mX: magnitude spectra in dB of up to B frames at a time; all blocks together hold the same frames as stftAnalMag
+	"""
+	if (H <= 0):                                   # raise error if hop size 0 or negative
+		raise ValueError("Hop size (H) smaller or equal to 0")
+
+	M = w.size                                      # size of analysis window
+	hM1 = (M+1)//2                                  # half analysis window size by rounding
+	hM2 = M//2                                      # half analysis window size by floor
+	w = w / sum(w)                                  # normalize analysis window
+	x = np.zeros(hM2)                               # pending samples, starting with the zeros that center the first window at sample 0
+	skip = 0                                        # samples still to drop before the next frame (only when H > M)
+	blocks = iter(xBlocks)
+	done = False
+	while not done:
+		xBlock = next(blocks, None)
+		if xBlock is None:                          # add zeros at the end to analyze last sample
+			xBlock = np.zeros(hM2)
+			done = True
+		dropped = min(skip, xBlock.size)            # samples between the last frame and the next one
+		skip -= dropped
+		x = np.append(x, xBlock[dropped:])
+		# a frame starting at sample s has its pointer at s+hM1, which must stay <= pend = x.size-hM1
+		nFrames = max(0, (x.size-2*hM1)//H + 1)
+		if not done:
+			nFrames = nFrames//B*B                      # wait for full batches until the end of the sound
+		if nFrames > 0:
+			xFrames = UF.frameView(x, M, H, nFrames)
+			for l in range(0, nFrames, B):
+				yield DFT.dftAnalMagFrames(xFrames[l:l+B], w, N, dtype)
+			skip = max(0, nFrames*H - x.size)           # the next frame can start beyond the pending samples
+			x = x[nFrames*H:]                           # keep the samples of the frames still to come
+
 def stftSynth(mY, pY, M, H) :
 	"""
 	Synthesis of a sound using the short-time Fourier transform
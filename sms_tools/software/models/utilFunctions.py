@@ -34,6 +34,19 @@ def isPower2(num):
 	"""
 	return ((num & (num - 1)) == 0) and num > 0
 
+def frameView(x, M, H, nFrames):
+	"""
+	Read-only view of a signal as a sequence of overlapping frames, without copying the samples
+	x: input array (1-D, contiguous), M: frame size, H: hop size, nFrames: number of frames
+	returns xFrames: (nFrames x M) array, row l holds x[l*H:l*H+M]
+	"""
+
+	x = np.ascontiguousarray(x)
+	if (nFrames > 0) and ((nFrames-1)*H + M > x.size):     # raise error if the last frame runs past the signal
+		raise ValueError("Signal too short for the requested number of frames")
+	return np.lib.stride_tricks.as_strided(x, shape=(max(nFrames, 0), M),
+		strides=(H*x.strides[0], x.strides[0]), writeable=False)
+
 INT16_FAC = (2**15)-1
 INT32_FAC = (2**31)-1
 INT64_FAC = (2**63)-1
@@ -125,6 +138,46 @@ def peakInterp(mX, pX, ploc):
 	ipphase = np.interp(iploc, np.arange(0, pX.size), pX)   # phase of peaks by linear interpolation
 	return iploc, ipmag, ipphase
 
+def peakDetectionFrames(mX, t):
+	"""
+	Detect spectral peak locations of several frames at once
+	mX: magnitude spectra (one spectrum per row), t: threshold
+	returns ploc, offsets: peak locations of all frames one after the other, and per frame the index of
+	its first peak in ploc (ploc[offsets[l]:offsets[l+1]] is peakDetection(mX[l], t))
+	"""
+
+	thresh = np.where(np.greater(mX[:,1:-1],t), mX[:,1:-1], 0) # locations above threshold
+	next_minor = np.where(mX[:,1:-1]>mX[:,2:], mX[:,1:-1], 0)  # locations higher than the next one
+	prev_minor = np.where(mX[:,1:-1]>mX[:,:-2], mX[:,1:-1], 0) # locations higher than the previous one
+	frames, ploc = (thresh * next_minor * prev_minor).nonzero() # locations fulfilling the three criteria, frame by frame
+	ploc = ploc + 1                                         # add 1 to compensate for previous steps
+	offsets = np.zeros(mX.shape[0]+1, dtype=int)            # start of the peaks of each frame
+	np.cumsum(np.bincount(frames, minlength=mX.shape[0]), out=offsets[1:])
+	return ploc, offsets
+
+def peakInterpFrames(mX, pX, ploc, offsets):
+	"""
+	Interpolate peak values of several frames at once using parabolic interpolation
+	mX, pX: magnitude and phase spectra (one spectrum per row), ploc, offsets: peaks as returned by peakDetectionFrames
+	returns iploc, ipmag, ipphase: interpolated peak locations, magnitudes and phases of all frames one after
+	the other, same values as peakInterp on each frame
+	"""
+
+	frames = np.repeat(np.arange(mX.shape[0]), np.diff(offsets)) # frame of every peak
+	val = mX[frames, ploc]                                  # magnitude of peak bin
+	lval = mX[frames, ploc-1]                               # magnitude of bin at left
+	rval = mX[frames, ploc+1]                               # magnitude of bin at right
+	iploc = ploc + 0.5*(lval-rval)/(lval-2*val+rval)        # center of parabola
+	ipmag = val - 0.25*(lval-rval)*(iploc-ploc)             # magnitude of peaks
+	# phase of peaks by linear interpolation, computed like np.interp; a peak bin is higher than its
+	# neighbours, so iploc always lies between bins 0 and pX.shape[1]-1
+	left = np.floor(iploc).astype(int)                      # bin at the left of each interpolated location
+	fraction = iploc - left
+	lphase = pX[frames, left]
+	slope = (pX[frames, left+1] - lphase) / 1.0
+	ipphase = np.where(fraction == 0, lphase, slope*fraction + lphase)
+	return iploc, ipmag, ipphase
+
 def sinc(x, N):
 	"""
 	Generate the main lobe of a sinc function (Dirichlet kernel)
@@ -230,6 +283,32 @@ def sinewaveSynth(freqs, amp, H, fs):
 		y = np.append(y, yh)                                  # append frame to previous one
 	return y
 
+def cleaningTracks(tracks, minTrackLength=3):
+	"""
+	Delete in place the fragments smaller than minTrackLength of all the tracks at once
+	tracks: (number of frames, number of tracks) array of values, modified in place
+	minTrackLength: minimum duration of tracks in number of frames
+	returns tracks: the same array, with the short fragments set to 0
+	"""
+
+	nFrames = tracks.shape[0]                           # number of frames
+	if tracks.size == 0:                                # if no frames or no tracks return input
+		return tracks
+	edges = np.diff(tracks > 0, axis=0, prepend=False, append=False) # contour beginnings and (exclusive) ends
+	tracksIdx, framesIdx = np.nonzero(edges.T)          # per track, beginnings and ends alternate
+	trackBegs = framesIdx[0::2]
+	trackEnds = framesIdx[1::2]
+	# like cleaningTrack always did, a contour that ends before the last frame counts (and is deleted)
+	# together with the frame that follows it
+	trackLengths = trackEnds - trackBegs + (trackEnds < nFrames) # lengths of track contours
+	short = trackLengths <= minTrackLength              # delete short track contours
+	trackBegs = trackBegs[short]
+	trackLengths = trackLengths[short]
+	segmentStarts = np.cumsum(trackLengths) - trackLengths      # position of each contour in the list of deleted values
+	frames = np.arange(trackLengths.sum()) + np.repeat(trackBegs - segmentStarts, trackLengths)
+	tracks[frames, np.repeat(tracksIdx[0::2][short], trackLengths)] = 0
+	return tracks
+
 def cleaningTrack(track, minTrackLength=3):
 	"""
 	Delete fragments of one single track smaller than minTrackLength
@@ -237,19 +316,8 @@ def cleaningTrack(track, minTrackLength=3):
 	returns cleanTrack: array of clean values
 	"""
 
-	nFrames = track.size                                # number of frames
-	cleanTrack = np.copy(track)                         # copy arrat
-	trackBegs = np.nonzero((track[:nFrames-1] <= 0)     # beginning of track contours
-								& (track[1:]>0))[0] + 1
-	if track[0]>0:
-		trackBegs = np.insert(trackBegs, 0, 0)
-	trackEnds = np.nonzero((track[:nFrames-1] > 0)  & (track[1:] <=0))[0] + 1
-	if track[nFrames-1]>0:
-		trackEnds = np.append(trackEnds, nFrames-1)
-	trackLengths = 1 + trackEnds - trackBegs           # lengths of trach contours
-	for i,j in zip(trackBegs, trackLengths):           # delete short track contours
-		if j <= minTrackLength:
-			cleanTrack[i:i+j] = 0
+	cleanTrack = np.copy(track)                         # copy array
+	cleaningTracks(cleanTrack[:,np.newaxis], minTrackLength) # delete short track contours
 	return cleanTrack
 
 
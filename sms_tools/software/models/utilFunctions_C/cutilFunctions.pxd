@@ -5,4 +5,5 @@ cdef extern from "utilFunctions.h":
 	
 	int TWM_C(double *pfreq, double *pmag, int nPeaks, double *f0c, int nf0c, double *f0, double *f0error)
 	void genbh92lobe_C(double *x, double *y, int N)
-	void genspecsines_C(double *iploc, double *ipmag, double *ipphase, int n_peaks, double *real, double*imag, int size_spec)
\ No newline at end of file
+	void genspecsines_C(double *iploc, double *ipmag, double *ipphase, int n_peaks, double *real, double*imag, int size_spec)
+	int sinetracking_C(double *pfreq, double *pmag, double *pphase, int *offsets, int nFrames, double *tfreq0, int maxnSines, double freqDevOffset, double freqDevSlope, double *xtfreq, double *xtmag, double *xtphase)
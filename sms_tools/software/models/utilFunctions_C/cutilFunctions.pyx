@@ -70,3 +70,40 @@ def genSpecSines(iploc, ipmag, ipphase,N):
     out = real_arr.astype(complex)
     out.imag = imag_arr
     return out
+
+
+def sineTracks(pfreq, pmag, pphase, offsets, tfreq, maxnSines, freqDevOffset=20, freqDevSlope=0.01):
+    """Tracking sinusoids over a sequence of frames, bit exact with calling sineModel.sineTracking frame after frame
+       and limiting the tracks to maxnSines (peaks of equal magnitude are taken in their order of appearance)
+       pfreq, pmag, pphase: peaks of all frames, those of frame l are pfreq[offsets[l]:offsets[l+1]]
+       tfreq: frequencies of incoming tracks before the first frame
+       returns xtfreq, xtmag, xtphase: (number of frames, maxnSines) arrays of tracks
+    """
+    
+    cdef np.ndarray[np.float_t, ndim=1] pfreq_arr
+    cdef np.ndarray[np.float_t, ndim=1] pmag_arr
+    cdef np.ndarray[np.float_t, ndim=1] pphase_arr
+    cdef np.ndarray[np.int32_t, ndim=1] offsets_arr
+    cdef np.ndarray[np.float_t, ndim=1] tfreq_arr
+    cdef np.ndarray[np.float_t, ndim=2] xtfreq_arr
+    cdef np.ndarray[np.float_t, ndim=2] xtmag_arr
+    cdef np.ndarray[np.float_t, ndim=2] xtphase_arr
+    
+    pfreq_arr = np.ascontiguousarray(pfreq, dtype=np.float64)
+    pmag_arr = np.ascontiguousarray(pmag, dtype=np.float64)
+    pphase_arr = np.ascontiguousarray(pphase, dtype=np.float64)
+    offsets_arr = np.ascontiguousarray(offsets, dtype=np.int32)
+    
+    tfreq = np.asarray(tfreq, dtype=np.float64)[:maxnSines]
+    tfreq_arr = np.zeros((maxnSines,), dtype=np.float64)
+    tfreq_arr[:tfreq.size] = tfreq
+    
+    nFrames = offsets_arr.shape[0]-1
+    xtfreq_arr = np.zeros((nFrames, maxnSines), dtype=np.float64)
+    xtmag_arr = np.zeros((nFrames, maxnSines), dtype=np.float64)
+    xtphase_arr = np.zeros((nFrames, maxnSines), dtype=np.float64)
+    
+    if sinetracking_C(<double *>pfreq_arr.data, <double *>pmag_arr.data, <double *>pphase_arr.data, <int *>offsets_arr.data, nFrames, <double *>tfreq_arr.data, maxnSines, freqDevOffset, freqDevSlope, <double *>xtfreq_arr.data, <double *>xtmag_arr.data, <double *>xtphase_arr.data) < 0:
+        raise MemoryError()
+    
+    return xtfreq_arr, xtmag_arr, xtphase_arr
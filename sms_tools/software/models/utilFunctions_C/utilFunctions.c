@@ -262,3 +262,151 @@ void genspecsines_C(double *iploc, double *ipmag, double *ipphase, int n_peaks,
 	}
 
 }
+
+typedef struct
+{
+	double val;
+	int ind;
+} valInd;
+
+/*orders by decreasing value, equal values by increasing index*/
+static int compareDescending(const void *a, const void *b)
+{
+	const valInd *x = (const valInd *)a, *y = (const valInd *)b;
+	if (x->val != y->val)
+		return (x->val > y->val) ? -1 : 1;
+	return x->ind - y->ind;
+}
+
+/*orders by increasing value, equal values by increasing index*/
+static int compareAscending(const void *a, const void *b)
+{
+	const valInd *x = (const valInd *)a, *y = (const valInd *)b;
+	if (x->val != y->val)
+		return (x->val < y->val) ? -1 : 1;
+	return x->ind - y->ind;
+}
+
+/*This function tracks the peaks of nFrames frames, the peaks of frame l are pfreq[offsets[l]:offsets[l+1]].
+Every frame does the same greedy assignment as sineTracking in sineModel.py: peaks in decreasing magnitude take
+the closest free incoming track (the lowest track index among equally close ones) if it is close enough, the
+remaining peaks start new tracks in the empty slots. tfreq0 holds the maxnSines incoming tracks of the first
+frame, the tracks of frame l are written to row l of xtfreq, xtmag and xtphase, which must be zero initialised.
+The incoming tracks are kept sorted by frequency, so the closest one is found with a binary search.*/
+int sinetracking_C(double *pfreq, double *pmag, double *pphase, int *offsets, int nFrames, double *tfreq0, int maxnSines, double freqDevOffset, double freqDevSlope, double *xtfreq, double *xtmag, double *xtphase)
+{
+	int ll, ii, jj, kk, first, nPeaks, maxPeaks=0, nIncoming, lo, hi, mid, best, peak;
+	double freq, distance, *tfreq, *tfreqn, *tmagn, *tphasen;
+	valInd *peaks, *incoming;
+	char *used;
+	
+	for(ll=0;ll<nFrames;ll++)
+	{
+		maxPeaks = max(maxPeaks, offsets[ll+1]-offsets[ll]);
+	}
+	peaks = (valInd *)malloc(sizeof(valInd)*max(maxPeaks, 1));
+	incoming = (valInd *)malloc(sizeof(valInd)*max(maxnSines, 1));
+	used = (char *)malloc(sizeof(char)*max(maxPeaks, 1));
+	if ((peaks == NULL) || (incoming == NULL) || (used == NULL))
+	{
+		free(peaks);
+		free(incoming);
+		free(used);
+		return -1;
+	}
+	
+	tfreq = tfreq0;
+	for(ll=0;ll<nFrames;ll++)
+	{
+		first = offsets[ll];
+		nPeaks = offsets[ll+1]-first;
+		tfreqn = xtfreq + oneTOtwo(ll, 0, maxnSines);
+		tmagn = xtmag + oneTOtwo(ll, 0, maxnSines);
+		tphasen = xtphase + oneTOtwo(ll, 0, maxnSines);
+		
+		for(ii=0;ii<nPeaks;ii++)
+		{
+			peaks[ii].val = pmag[first+ii];
+			peaks[ii].ind = ii;
+			used[ii] = 0;
+		}
+		qsort(peaks, nPeaks, sizeof(valInd), compareDescending);
+		nIncoming = 0;
+		for(jj=0;jj<maxnSines;jj++)
+		{
+			if (tfreq[jj] != 0)
+			{
+				incoming[nIncoming].val = tfreq[jj];
+				incoming[nIncoming].ind = jj;
+				nIncoming++;
+			}
+		}
+		qsort(incoming, nIncoming, sizeof(valInd), compareAscending);
+		
+		//continue incoming tracks
+		for(ii=0;(ii<nPeaks)&&(nIncoming>0);ii++)
+		{
+			peak = peaks[ii].ind;
+			freq = pfreq[first+peak];
+			lo = 0;
+			hi = nIncoming;
+			while(lo<hi)                  //first incoming track with a frequency >= freq
+			{
+				mid = (lo+hi)/2;
+				if (incoming[mid].val < freq)
+					lo = mid+1;
+				else
+					hi = mid;
+			}
+			distance = DBL_MAX;
+			if (lo>0)
+				distance = fabs(freq-incoming[lo-1].val);
+			if (lo<nIncoming)
+				distance = min(distance, fabs(freq-incoming[lo].val));
+			best = -1;
+			for(kk=lo-1;(kk>=0)&&(fabs(freq-incoming[kk].val)==distance);kk--)
+			{
+				if ((best<0) || (incoming[kk].ind<incoming[best].ind))
+					best = kk;
+			}
+			for(kk=lo;(kk<nIncoming)&&(fabs(freq-incoming[kk].val)==distance);kk++)
+			{
+				if ((best<0) || (incoming[kk].ind<incoming[best].ind))
+					best = kk;
+			}
+			if (distance < (freqDevOffset + freqDevSlope * freq))
+			{
+				jj = incoming[best].ind;
+				tfreqn[jj] = freq;
+				tmagn[jj] = pmag[first+peak];
+				tphasen[jj] = pphase[first+peak];
+				used[peak] = 1;
+				memmove(incoming+best, incoming+best+1, sizeof(valInd)*(nIncoming-best-1));
+				nIncoming--;
+			}
+		}
+		
+		//create new tracks from non used peaks, extra tracks beyond maxnSines are dropped
+		jj = 0;
+		for(ii=0;ii<nPeaks;ii++)
+		{
+			peak = peaks[ii].ind;
+			if (used[peak])
+				continue;
+			while((jj<maxnSines)&&(tfreq[jj] != 0))
+				jj++;
+			if (jj>=maxnSines)
+				break;
+			tfreqn[jj] = pfreq[first+peak];
+			tmagn[jj] = pmag[first+peak];
+			tphasen[jj] = pphase[first+peak];
+			jj++;
+		}
+		tfreq = tfreqn;
+	}
+	
+	free(peaks);
+	free(incoming);
+	free(used);
+	return 1;
+}
@@ -40,5 +40,6 @@ void minValArg(double *data, int dLen, double *min_val, int*min_ind);
 void computeTWMError(double **peakMTX1, int nCols1, double **peakMTX2, int nCols2, int maxnpeaks, double * pmag, double *f0Error, int nF0Cands, int PMorMP);
 int nearestElement(double val, double *data, int len, double *min_val);
 int TWM_C(double *pfreq, double *pmag, int nPeaks, double *f0c, int nf0c, double *f0, double *f0error);
+int sinetracking_C(double *pfreq, double *pmag, double *pphase, int *offsets, int nFrames, double *tfreq0, int maxnSines, double freqDevOffset, double freqDevSlope, double *xtfreq, double *xtmag, double *xtphase);
 
 #endif  //UTILFUNCTIONS_H
\ No newline at end of file
@@ -0,0 +1,168 @@
+import argparse
+import hashlib
+import os
+import pathlib
+import tempfile
+
+import numpy as np
+
+
+class SpectrogramCache(object):
+    """
+    on-disk cache of spectrogram matrices, stored as .npy files and loaded memory-mapped
+
+    entries are named <audio hash>-<parameter hash>.npy, where the audio hash is taken over the bytes of
+    the audio file and the parameter hash over the analysis parameters; when the total size exceeds
+    max_bytes, the least recently used entries are removed
+    """
+
+    def __init__(self, directory, max_bytes=1024 ** 3):
+        self.directory = pathlib.Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def audio_hash(filename):
+        h = hashlib.sha256()
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()[:32]
+
+    @staticmethod
+    def key(filename, **parameters):
+        """
+        :param filename: audio file the spectrogram is computed from
+        :param parameters: analysis parameters (window type, fft size, window size, hop size, ...)
+        :return: cache key for that file content and those parameters
+        """
+        parameter_string = ",".join(f"{name}={parameters[name]!r}" for name in sorted(parameters))
+        parameter_hash = hashlib.sha256(parameter_string.encode()).hexdigest()[:16]
+        return f"{SpectrogramCache.audio_hash(filename)}-{parameter_hash}"
+
+    def path(self, key):
+        return self.directory.joinpath(f"{key}.npy")
+
+    def entries(self):
+        return list(self.directory.glob("*.npy")) if self.directory.is_dir() else []
+
+    def load(self, key):
+        """
+        :return: memory-mapped (read-only) matrix stored under key, or None if there is no such entry
+        """
+        path = self.path(key)
+        try:
+            matrix = np.load(path, mmap_mode='r')
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, ValueError):  # also when another process evicts it in between
+            return None
+        return matrix
+
+    def create(self, shape, dtype):
+        """
+        :return: writable memory-mapped matrix in a temporary file of the cache, to be filled and passed to store
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        handle, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(handle)
+        return np.lib.format.open_memmap(temporary_path, mode='w+', dtype=dtype, shape=shape)
+
+    def discard(self, matrix):
+        """
+        removes the temporary file of a matrix from create() that will not be stored (e.g. the analysis failed)
+        """
+        pathlib.Path(matrix.filename).unlink(missing_ok=True)
+
+    def store(self, key, matrix):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # entries are written to a temporary file first, so concurrent readers never see a partial entry
+        # both sides resolved: memmap filenames are absolute but keep symlinks, resolve() follows them
+        if (isinstance(matrix, np.memmap)
+                and pathlib.Path(matrix.filename).resolve().parent == self.directory.resolve()):
+            matrix.flush()  # created by create(), already in place
+            temporary_path = matrix.filename
+        else:
+            handle, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, "wb") as f:
+                np.save(f, np.ascontiguousarray(matrix))
+        os.replace(temporary_path, self.path(key))
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """
+        removes the least recently used entries until the total size is at most max_bytes
+        :param keep: key of an entry that is never removed (the one just stored), even when it alone is larger
+        """
+        entries = []
+        for path in self.entries():
+            if keep is not None and path.name == self.path(keep).name:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # removed by another process in the meantime
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        if keep is not None:
+            try:
+                total += self.path(keep).stat().st_size
+            except FileNotFoundError:
+                pass
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def invalidate(self, filename=None):
+        """
+        :param filename: remove the entries computed from this audio file, or all entries if None
+        :return: number of removed entries
+        """
+        pattern = f"{self.audio_hash(filename)}-*.npy" if filename is not None else "*.npy"
+        removed = 0
+        if self.directory.is_dir():
+            for path in self.directory.glob(pattern):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def remove_temporary_files(self):
+        """
+        removes the temporary files left behind by analyses that were killed before they could clean up;
+        only call this when no analysis is writing to the cache
+        :return: number of removed files
+        """
+        removed = 0
+        if self.directory.is_dir():
+            for path in self.directory.glob("*.tmp"):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def size(self):
+        return sum(path.stat().st_size for path in self.entries())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="inspect or invalidate the spectrogram cache")
+    parser.add_argument("--directory", default=pathlib.Path(__file__).parent.joinpath("cache", "spectrograms"))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("info", help="show the number and total size of the cached spectrograms")
+    clear_parser = subparsers.add_parser("clear", help="remove cached spectrograms (and, when no filenames are "
+                                                       "given, temporary files of interrupted analyses)")
+    clear_parser.add_argument("filenames", nargs="*", help="only remove the entries of these audio files")
+    args = parser.parse_args()
+
+    cache = SpectrogramCache(args.directory)
+    if args.command == "info":
+        print(f"{len(cache.entries())} entries, {cache.size() / 1024 ** 2:.1f} MiB in {cache.directory}")
+    elif args.filenames:
+        for filename in args.filenames:
+            print(f"{filename}: removed {cache.invalidate(filename)} entries")
+    else:
+        print(f"removed {cache.invalidate()} entries and {cache.remove_temporary_files()} temporary files")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import numpy as np
+from mido import Message
+from scipy.signal import get_window
+
+from event_list import Event
+from main import STFT_SETTINGS, note_lookup, note_energy, scale_velocities
+from mapping import LinLin
+from sms_tools.software.models import dftModel as DFT
+from sms_tools.software.models import utilFunctions as UF
+
+
+class StreamingConverter(object):
+    """
+    incremental audio to midi conversion: audio blocks go into process(), which returns the note_on and
+    note_off events decided by them, at most one hop plus one analysis window after the audio that caused them
+
+    the per-note state is the one distill_timeline keeps: a note starts at the first frame whose velocity
+    reaches velocity_threshold and stops at the next frame in which it is present below that threshold.
+    Unlike the offline conversion, the velocity range cannot be taken from the whole file, so amplitudes are
+    scaled from [min_amplitude_db, max_amplitude_db], and a note_on carries the velocity of its first frame
+    """
+
+    def __init__(self, fs, test_set, channel=0, max_amplitude_db=0.0, callback=None, aggregation='max',
+                 settings=STFT_SETTINGS):
+        """
+        :param fs: sampling rate of the audio blocks
+        :param test_set: TestSetEntry with the note range, transposition and thresholds to use
+        :param channel: midi channel of the events
+        :param max_amplitude_db: amplitude that maps to velocity 127
+        :param callback: if given, called with every event as soon as it is decided (e.g. JackPlayer.send)
+        :param aggregation: how the fft bins of one note are combined, see main.note_energy
+        :param settings: StftSettings of the analysis
+        """
+        self.test_set = test_set
+        self.channel = channel
+        self.max_amplitude_db = max_amplitude_db
+        self.callback = callback
+        self.aggregation = aggregation
+        self.settings = settings
+        self.lookup = note_lookup(fs, settings.fft_size, test_set.transposition, test_set.min_note, test_set.max_note)
+        self.time_step = settings.hop_size / fs
+        self.velocity_mapping = LinLin(test_set.min_amplitude_db, max_amplitude_db, 0, 127)
+        self.w = get_window(settings.window, settings.window_size)
+        self.hm1 = (settings.window_size + 1) // 2
+        self.hm2 = settings.window_size // 2
+
+        self.pending = np.zeros(self.hm2)  # samples of the frames still to come, centering the first one at 0
+        self.skip = 0  # samples to drop before the next frame, when it starts beyond the pending samples (hop > window)
+        self.frame = 0  # index of the next frame
+        self.start = np.full(128, -1)  # per note: first frame of the sounding note, -1 if not sounding
+        self.last = np.zeros(128, dtype=int)  # per note: last frame at or above the velocity threshold
+
+    def process(self, block):
+        """
+        :param block: next block of mono audio samples (any size)
+        :return: list of Event decided by this block
+        """
+        dropped = min(self.skip, len(block))
+        self.skip -= dropped
+        self.pending = np.append(self.pending, block[dropped:])
+        # like stft.stftAnalMag, a frame starting at sample s needs s + 2 * hM1 samples
+        no_of_frames = max(0, (self.pending.size - 2 * self.hm1) // self.settings.hop_size + 1)
+        if no_of_frames == 0:
+            return []
+        frames = UF.frameView(self.pending, self.settings.window_size, self.settings.hop_size, no_of_frames)
+        hmag = DFT.dftAnalMagFrames(frames, self.w, self.settings.fft_size)
+        self.skip = max(0, no_of_frames * self.settings.hop_size - self.pending.size)
+        self.pending = self.pending[no_of_frames * self.settings.hop_size:]
+        energy = note_energy(hmag, self.lookup, self.aggregation)
+        velocities = scale_velocities(energy, self.test_set.min_amplitude_db, self.velocity_mapping)
+        events = []
+        for frame_velocities in velocities:
+            events.extend(self.step(frame_velocities))
+        return events
+
+    def step(self, velocities):
+        # advance the per-note state by one frame of 128 velocities (0 = note not present)
+        present = velocities > 0
+        present[0] = False
+        go = present & (velocities >= self.test_set.velocity_threshold)
+        stop = present & ~go
+        stopping = np.nonzero(stop & (self.start >= 0))[0]
+        starting = np.nonzero(go & (self.start < 0))[0]
+        events = [Event(type='note_off', channel=self.channel, time=(self.last[note] + 1) * self.time_step,
+                        note=int(note), velocity=0) for note in stopping]
+        events.extend(Event(type='note_on', channel=self.channel, time=self.frame * self.time_step,
+                            note=int(note), velocity=int(velocities[note])) for note in starting)
+        self.start[stopping] = -1
+        self.start[starting] = self.frame
+        self.last[go] = self.frame
+        self.frame += 1
+        self.emit(events)
+        return events
+
+    def flush(self):
+        """
+        analyses the remaining samples as the end of the sound and stops all sounding notes
+        :return: list of the last Events
+        """
+        events = self.process(np.zeros(self.hm2))
+        self.pending = np.zeros(self.hm2)
+        self.skip = 0
+        sounding = np.nonzero(self.start >= 0)[0]
+        stops = [Event(type='note_off', channel=self.channel, time=(self.last[note] + 1) * self.time_step,
+                       note=int(note), velocity=0) for note in sounding]
+        self.start[sounding] = -1
+        self.emit(stops)
+        return events + stops
+
+    def emit(self, events):
+        if self.callback is not None:
+            for event in events:
+                self.callback(event)
+
+
+def mido_sender(outport):
+    """
+    :param outport: opened mido output port
+    :return: callback for StreamingConverter that sends every event to outport
+    """
+    def send(event):
+        outport.send(Message(event.type, channel=event.channel, note=event.note, velocity=event.velocity))
+    return send
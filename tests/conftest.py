@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# the modules under test live at the top of the repository
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
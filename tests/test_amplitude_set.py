@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from main import amplitude_set, max_amplitude, min_above
+
+
+def reference_min_above(h, threshold):
+    # compared as python floats: a float32 array against a python float would compare in float32 on older numpy
+    above = h[h.astype(float) > threshold]
+    return float(above.min()) if len(above) else None
+
+
+def thresholds(rng, h):
+    values = rng.choice(h.ravel(), 5).astype(float).tolist() if h.size else []
+    # exactly between two neighbouring float32 values, so rounding the threshold to float32 would go either way
+    between = [(v + float(np.nextafter(np.float32(v), np.float32(np.inf)))) / 2 for v in values]
+    return values + between + [np.nextafter(v, -np.inf) for v in values] + [0.0, -0.0, 1e-50, -1e-50, -np.inf,
+                                                                            np.inf, -1e39, 1e39, -90.5]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_min_above_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    h = (rng.standard_normal((int(rng.integers(0, 40)), 9)) * rng.choice([1e-40, 1e-3, 1.0, 60.0]) - 30)
+    h = h.astype(np.float32)
+    if h.size and seed % 2:
+        h[0, :2] = [-0.0, 0.0]
+    amplitudes = amplitude_set(h, frames_per_block=int(rng.integers(1, 8)))
+    for threshold in thresholds(rng, h):
+        assert min_above(amplitudes, threshold) == reference_min_above(h, threshold), threshold
+    if h.size:
+        assert max_amplitude(amplitudes) == float(h.max())
+
+
+@pytest.mark.parametrize("values, threshold, expected", [
+    ([-0.0, 1.0], -1e-50, 0.0),  # -0.0 > -1e-50
+    ([-0.0, 1.0], 0.0, 1.0),  # -0.0 is not above 0.0
+    ([0.0, 1.0], -0.0, 1.0),  # nor is 0.0 above -0.0
+    ([-0.0], 0.0, None),
+])
+def test_min_above_signed_zeros(values, threshold, expected):
+    h = np.array([values], dtype=np.float32)
+    assert min_above(amplitude_set(h), threshold) == expected
+
+
+def test_min_above_between_float32_neighbours():
+    low = np.float32(-100.0)
+    high = np.nextafter(low, np.float32(0))
+    h = np.array([[low, high]], dtype=np.float32)
+    middle = (float(low) + float(high)) / 2
+    assert min_above(amplitude_set(h), middle) == float(high)
+    assert min_above(amplitude_set(h), float(low)) == float(high)
+    assert min_above(amplitude_set(h), np.nextafter(float(low), -np.inf)) == float(low)
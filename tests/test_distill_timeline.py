@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from main import Score, distill_timeline, distill_timeline_matrix
+
+TIME_STEP = 2048 / 44100
+
+
+def timeline_from_score(velocities, channel, vel_threshold):
+    frames, notes = np.nonzero(velocities)
+    score = Score(frames=frames, notes=notes, velocities=velocities[frames, notes], channel=channel)
+    return [tuple(entry) for entry in distill_timeline(TIME_STEP, score, vel_threshold)]
+
+
+def timeline_from_matrix(velocities, channel, vel_threshold):
+    return distill_timeline_matrix(TIME_STEP, velocities, channel, vel_threshold).tolist()
+
+
+def random_velocities(rng, frames, density):
+    velocities = rng.integers(1, 128, size=(frames, 128))
+    velocities[rng.random((frames, 128)) > density] = 0
+    return velocities
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matrix_matches_score(seed):
+    rng = np.random.default_rng(seed)
+    velocities = random_velocities(rng, int(rng.integers(1, 60)), rng.uniform(0.05, 1.0))
+    vel_threshold = int(rng.integers(0, 129))
+    assert timeline_from_matrix(velocities, 2, vel_threshold) == timeline_from_score(velocities, 2, vel_threshold)
+
+
+def test_note_zero_is_ignored():
+    velocities = np.zeros((4, 128), dtype=int)
+    velocities[:, 0] = [120, 120, 10, 120]
+    velocities[:, 60] = [120, 110, 10, 0]
+    expected = [(0.0, 2 * TIME_STEP, 0, 60, 115)]
+    assert timeline_from_score(velocities, 0, 100) == expected
+    assert timeline_from_matrix(velocities, 0, 100) == expected
+
+
+def test_runs_left_open_at_the_end_are_dropped():
+    velocities = np.zeros((5, 128), dtype=int)
+    velocities[:, 40] = [120, 10, 120, 120, 120]
+    velocities[:, 41] = [0, 0, 0, 0, 120]
+    expected = [(0.0, TIME_STEP, 1, 40, 120)]
+    assert timeline_from_score(velocities, 1, 100) == expected
+    assert timeline_from_matrix(velocities, 1, 100) == expected
+
+
+@pytest.mark.parametrize("shape", [(0, 128), (3, 128)])
+def test_empty_input(shape):
+    velocities = np.zeros(shape, dtype=int)
+    assert timeline_from_score(velocities, 0, 100) == []
+    assert timeline_from_matrix(velocities, 0, 100) == []
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from event_list import Event
+from jack_simulator import SimulatedClient, simulate, timing_errors
+from jack_player import JackPlayer
+
+FS = 48000
+BLOCK = 256
+
+
+def events_at(samples, end):
+    # times are exact multiples of 1 / FS, the first event is at sample 0
+    events = [Event(type='note_on', channel=1, time=sample / FS, note=60 + i % 12, velocity=1 + i % 127)
+              for i, sample in enumerate(samples)]
+    return events + [Event(type='nop', channel=0, time=end / FS, note=0, velocity=0)]
+
+
+def test_messages_at_their_sample_offsets():
+    samples = [0, 1, BLOCK - 1, BLOCK, BLOCK + 1, 2 * BLOCK - 1, 2 * BLOCK, 5 * BLOCK, 5 * BLOCK, 7 * BLOCK + 100]
+    event_list = events_at(samples, 8 * BLOCK)
+    result = simulate(event_list, FS, BLOCK)
+    assert [sample_time for sample_time, _ in result.messages] == samples
+    assert [message for _, message in result.messages] == [
+        bytes([0x91, event.note, event.velocity]) for event in event_list[:-1]]
+    assert np.all(np.abs(timing_errors(event_list, result.messages, FS)) < 1e-6)
+    # the nop at 8 * BLOCK is the end, so the block starting there is still processed
+    assert result.blocks == 9
+
+
+def test_offsets_stay_inside_their_block():
+    client = SimulatedClient(FS, BLOCK)
+    player = JackPlayer(events_at([0, BLOCK - 1, BLOCK, 3 * BLOCK], 3 * BLOCK), autoconnect=None, client=client)
+    offsets = []
+
+    def write_midi_event(offset, data):
+        offsets.append((client.frame_time, offset))
+
+    player.outport.write_midi_event = write_midi_event
+    client.run()
+    assert offsets == [(0, 0), (0, BLOCK - 1), (BLOCK, 0), (3 * BLOCK, 0)]
+
+
+@pytest.mark.parametrize("blocksize", [1, 64, 256, 1000])
+def test_random_event_list(blocksize):
+    rng = np.random.default_rng(blocksize)
+    samples = np.sort(rng.integers(0, 20 * BLOCK, size=200))
+    samples[0] = 0
+    event_list = events_at(samples.tolist(), int(samples[-1]) + 10)
+    result = simulate(event_list, FS, blocksize)
+    assert [sample_time for sample_time, _ in result.messages] == samples.tolist()
+    assert np.all(np.abs(timing_errors(event_list, result.messages, FS)) < 1e-6)
+
+
+def test_rounding_to_the_nearest_sample():
+    event_list = [Event(type='note_on', channel=0, time=0.0, note=60, velocity=100),
+                  Event(type='note_off', channel=0, time=10.4 / FS, note=60, velocity=0),
+                  Event(type='note_on', channel=0, time=BLOCK / FS - 0.4 / FS, note=61, velocity=100)]
+    result = simulate(event_list, FS, BLOCK)
+    assert [sample_time for sample_time, _ in result.messages] == [0, 10, BLOCK]
+    assert np.allclose(timing_errors(event_list, result.messages, FS), [0, -0.4, 0.4])
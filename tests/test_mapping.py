@@ -0,0 +1,75 @@
+import itertools
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+from mapping import ExpExp, ExpLin, LinExp, LinLin, Mapping
+
+VALUES = [-2.0, -1.0, 0.0, 0.5, 1.0, 2.0, 3.0]
+NAMES = ['linlin', 'linexp', 'explin', 'expexp']
+
+
+def scalar(function, *args):
+    # None, or an exception from math, is NaN in the array functions
+    try:
+        output = function(*args)
+    except (ValueError, ZeroDivisionError, OverflowError):
+        return math.nan
+    return math.nan if output is None else float(output)
+
+
+def same(name, expected, got):
+    if math.isnan(expected) or math.isnan(got):
+        return math.isnan(expected) and math.isnan(got)
+    if name in ('explin', 'expexp'):  # np.log and math.log may differ in the last bit
+        return math.isclose(expected, got, rel_tol=1e-12, abs_tol=1e-12)
+    return expected == got
+
+
+@pytest.mark.parametrize("clip", [True, False])
+@pytest.mark.parametrize("name", NAMES)
+def test_array_functions_match_scalar(name, clip):
+    function = getattr(Mapping, name)
+    array_function = getattr(Mapping, name + '_array')
+    # every combination of value and range, the ranges broadcast along with the values
+    grid = list(itertools.product(VALUES, repeat=5))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        got = array_function(*np.array(grid).T, clip=clip)
+    assert got.dtype == float and got.shape == (len(grid),)
+    for args, output in zip(grid, got):
+        assert same(name, scalar(function, *args, clip), float(output)), args
+
+
+@pytest.mark.parametrize("clip", [True, False])
+@pytest.mark.parametrize("name, cls", [('linlin', LinLin), ('linexp', LinExp), ('explin', ExpLin), ('expexp', ExpExp)])
+def test_mappers_match_scalar(name, cls, clip):
+    function = getattr(Mapping, name)
+    values = np.array(VALUES)
+    for in_min, in_max, out_min, out_max in itertools.product(VALUES, repeat=4):
+        try:
+            mapper = cls(in_min, in_max, out_min, out_max, clip)
+        except ValueError:  # only for ranges where the function is undefined for every value
+            assert all(math.isnan(scalar(function, value, in_min, in_max, out_min, out_max, clip))
+                       for value in VALUES), (in_min, in_max, out_min, out_max)
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            array_outputs = mapper(values)
+            expected_array = getattr(Mapping, name + '_array')(values, in_min, in_max, out_min, out_max, clip)
+        # the array path computes like the array function, so it matches it exactly
+        assert np.array_equal(array_outputs, expected_array, equal_nan=True), (in_min, in_max, out_min, out_max)
+        for value, array_output in zip(VALUES, array_outputs):
+            expected = scalar(function, value, in_min, in_max, out_min, out_max, clip)
+            # and the scalar path like the scalar function
+            assert same('linlin', expected, scalar(mapper, value)), (value, in_min, in_max, out_min, out_max)
+            assert same(name, expected, float(array_output)), (value, in_min, in_max, out_min, out_max)
+
+
+def test_expexp_negative_output_ratio():
+    # (-0.25) ** 1: the array path must not turn the exponent 1 into 0.9999999999999998
+    mapper = ExpExp(1, 3, -2, 0.5)
+    assert mapper(3.0) == 0.5
+    assert mapper(np.array([3.0]))[0] == 0.5
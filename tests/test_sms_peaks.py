@@ -0,0 +1,35 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'sms_tools', 'software', 'models', 'utilFunctions_C'))
+pytest.importorskip("utilFunctions_C", reason="the cython module of sms-tools is not compiled")
+
+from sms_tools.software.models import utilFunctions as UF  # noqa: E402
+
+
+def spectra(rng, nFrames, nBins):
+    # quantized, so there are plateaus, equal neighbours and values equal to the threshold
+    step = rng.choice([0.01, 5.0, 20.0])
+    mX = np.round(rng.uniform(-100, 0, (nFrames, nBins)) / step) * step
+    mX[rng.random(mX.shape) < 0.05] = 0.0
+    pX = rng.uniform(-np.pi, np.pi, (nFrames, nBins))
+    return mX, pX
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_peak_frames_match_each_frame(seed):
+    rng = np.random.default_rng(seed)
+    mX, pX = spectra(rng, int(rng.integers(0, 20)), int(rng.integers(3, 300)))
+    t = float(rng.choice([-80.0, -50.0, -20.0, 0.0, 10.0]))
+    ploc, offsets = UF.peakDetectionFrames(mX, t)
+    iploc, ipmag, ipphase = UF.peakInterpFrames(mX, pX, ploc, offsets)
+    assert len(offsets) == mX.shape[0] + 1 and offsets[0] == 0 and offsets[-1] == len(ploc)
+    for l in range(mX.shape[0]):
+        frame = slice(offsets[l], offsets[l+1])
+        expected = UF.peakDetection(mX[l], t)
+        assert np.array_equal(ploc[frame], expected)
+        for got, value in zip((iploc, ipmag, ipphase), UF.peakInterp(mX[l], pX[l], expected)):
+            assert np.array_equal(got[frame], value)
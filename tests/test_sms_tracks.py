@@ -0,0 +1,95 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+from scipy.signal import get_window
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'sms_tools', 'software', 'models', 'utilFunctions_C'))
+pytest.importorskip("utilFunctions_C", reason="the cython module of sms-tools is not compiled")
+
+from main import read_mono  # noqa: E402
+from sms_tools.software.models import sineModel as SM, utilFunctions as UF  # noqa: E402
+
+# sineTracking still uses np.int
+pytestmark = pytest.mark.filterwarnings("ignore:`np.int` is a deprecated alias:DeprecationWarning")
+
+
+def cleaningTrackLoop(track, minTrackLength):
+    # cleaningSineTracks before it was vectorized, for one track
+    nFrames = track.size
+    trackBegs = np.nonzero((track[:nFrames-1] <= 0) & (track[1:] > 0))[0] + 1
+    if track[0] > 0:
+        trackBegs = np.insert(trackBegs, 0, 0)
+    trackEnds = np.nonzero((track[:nFrames-1] > 0) & (track[1:] <= 0))[0] + 1
+    if track[nFrames-1] > 0:
+        trackEnds = np.append(trackEnds, nFrames-1)
+    trackLengths = 1 + trackEnds - trackBegs
+    for i, j in zip(trackBegs, trackLengths):
+        if j <= minTrackLength:
+            track[i:i+j] = 0
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_cleaning_tracks_match_loop(seed):
+    rng = np.random.default_rng(seed)
+    nFrames, nTracks = int(rng.integers(1, 40)), int(rng.integers(0, 8))
+    tracks = rng.choice([0.0, -0.0, -1.0, 100.0, 200.0], size=(nFrames, nTracks), p=[.2, .05, .05, .35, .35])
+    tracks *= rng.random(tracks.shape) + 0.5
+    minTrackLength = int(rng.integers(0, 6))
+    expected = tracks.copy()
+    for track in expected.T:
+        cleaningTrackLoop(track, minTrackLength)
+    got = tracks.copy()
+    assert SM.cleaningSineTracks(got, minTrackLength) is got
+    # -0.0 and negatives in the frame after a deleted contour are set to 0.0 as before
+    assert np.array_equal(got, expected) and np.array_equal(np.signbit(got), np.signbit(expected))
+    if nTracks:
+        track = tracks[:, 0].copy()
+        assert np.array_equal(UF.cleaningTrack(track, minTrackLength), expected[:, 0])
+        assert np.array_equal(track, tracks[:, 0])  # cleaningTrack works on a copy
+
+
+def random_peaks(rng, nFrames, maxPeaks):
+    # frequencies on a grid around the incoming tracks, so peaks are often equally far from two tracks,
+    # and few magnitudes, so many peaks are equally strong (more than 16 a frame, where np.argsort stops
+    # being stable unless asked to); peaks have positive frequencies, like those of spectralPeaks
+    counts = rng.integers(0, maxPeaks + 1, size=nFrames)
+    offsets = np.zeros(nFrames + 1, dtype=int)
+    np.cumsum(counts, out=offsets[1:])
+    nPeaks = offsets[-1]
+    pfreq = rng.choice([100.0, 105.0, 110.0, 120.0, 130.0, 400.0, 1000.0], size=nPeaks)
+    pfreq += rng.choice([0.0, 0.0, 0.5, 20.0], size=nPeaks)
+    pmag = rng.choice([-10.0, -20.0, -30.0], size=nPeaks)
+    pphase = rng.uniform(-np.pi, np.pi, nPeaks)
+    return pfreq, pmag, pphase, offsets
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_sine_tracks_match_python(seed):
+    rng = np.random.default_rng(seed)
+    pfreq, pmag, pphase, offsets = random_peaks(rng, int(rng.integers(0, 30)), int(rng.choice([4, 12, 60])))
+    maxnSines = int(rng.integers(1, 10))  # often fewer than the peaks of a frame
+    if seed % 2:
+        tfreq = np.array([])
+    else:  # more incoming tracks than maxnSines too, only the first maxnSines are continued
+        tfreq = rng.choice([0.0, 100.0, 115.0, 125.0], size=int(rng.integers(0, 12)))
+    expected = SM.sineTrackingFrames(pfreq, pmag, pphase, offsets, tfreq, maxnSines)
+    got = UF.UF_C.sineTracks(pfreq, pmag, pphase, offsets, tfreq, maxnSines)
+    for value, result in zip(expected, got):
+        assert result.shape == (len(offsets) - 1, maxnSines)
+        assert np.array_equal(result, value)
+
+
+@pytest.mark.parametrize("maxnSines, t", [(100, -80), (20, -60)])
+def test_sine_model_anal_without_compiled_tracking(monkeypatch, maxnSines, t):
+    fs, x = read_mono(os.path.join(os.path.dirname(__file__), '..', 'inputs', 'doremifasol.wav'))
+    x = x[:2 * fs]
+    w = get_window('hamming', 2001)
+    compiled = SM.sineModelAnal(x, fs, w, 2048, 256, t, maxnSines)
+    monkeypatch.setattr(UF, 'UF_C', types.SimpleNamespace())  # a compiled module without sineTracks
+    fallback = SM.sineModelAnal(x, fs, w, 2048, 256, t, maxnSines)
+    assert compiled[0].size > 0
+    for value, result in zip(compiled, fallback):
+        assert np.array_equal(result, value)
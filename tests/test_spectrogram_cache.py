@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+
+from spectrogram_cache import SpectrogramCache
+
+
+def test_store_created_matrix_through_symlinked_directory(tmp_path):
+    (tmp_path / "real").mkdir()
+    os.symlink(tmp_path / "real", tmp_path / "link")
+    cache = SpectrogramCache(tmp_path / "link" / "cache")
+    matrix = cache.create((3, 4), np.float32)
+    matrix[:] = np.arange(12).reshape(3, 4)
+    cache.store("k", matrix)
+    assert sorted(path.name for path in (tmp_path / "real" / "cache").iterdir()) == ["k.npy"]
+    assert np.array_equal(cache.load("k"), np.arange(12).reshape(3, 4))
+
+
+def test_store_copies_other_matrices(tmp_path):
+    cache = SpectrogramCache(tmp_path)
+    cache.store("k", np.ones((2, 2)))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["k.npy"]
+    assert np.array_equal(cache.load("k"), np.ones((2, 2)))
+
+
+def test_load_missing_entry(tmp_path):
+    assert SpectrogramCache(tmp_path).load("missing") is None
+
+
+def test_evict_keeps_entry_just_stored(tmp_path):
+    cache = SpectrogramCache(tmp_path, max_bytes=1000)
+    cache.store("old", np.zeros(100))
+    cache.store("new", np.zeros(1000))  # alone larger than max_bytes
+    assert [path.name for path in cache.entries()] == ["new.npy"]
+
+
+def test_discard_and_remove_temporary_files(tmp_path):
+    cache = SpectrogramCache(tmp_path)
+    cache.discard(cache.create((2, 2), np.float32))
+    cache.create((2, 2), np.float32)
+    assert cache.remove_temporary_files() == 1
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from scipy.signal import get_window
+
+from sms_tools.software.models import stft
+
+
+def split(rng, x, blocks):
+    return np.split(x, np.sort(rng.integers(0, len(x) + 1, size=blocks)))
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_stream_matches_stftAnalMag(seed):
+    rng = np.random.default_rng(seed)
+    M = int(rng.integers(3, 80))
+    H = int(rng.integers(1, 2 * M)) if seed % 2 else int(rng.integers(M + 1, 3 * M))  # odd seeds: H > M
+    N = 1 << int(np.ceil(np.log2(M)))
+    x = rng.standard_normal(int(rng.integers(0, 2000)))
+    w = get_window('hamming', M)
+    expected = stft.stftAnalMag(x, w, N, H)
+    blocks = list(stft.stftAnalMagStream(iter(split(rng, x, int(rng.integers(0, 12)))), w, N, H,
+                                         B=int(rng.integers(1, 9))))
+    got = np.concatenate(blocks) if blocks else np.zeros((0, N // 2 + 1), dtype=np.float32)
+    assert got.shape == expected.shape
+    assert np.array_equal(got, expected)
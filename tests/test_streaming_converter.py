@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from main import StftSettings, test_sets
+from streaming_converter import StreamingConverter
+
+FS = 44100
+
+
+def tones(seconds=3.0):
+    # a few notes that come and go, plus some noise
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * FS)) / FS
+    x = 0.001 * rng.standard_normal(len(t))
+    for frequency, start, stop in [(440.0, 0.2, 1.1), (660.0, 0.5, 2.0), (261.6, 1.4, 2.7), (880.0, 2.2, 2.5)]:
+        x += 0.3 * np.sin(2 * np.pi * frequency * t) * ((t >= start) & (t < stop))
+    return x
+
+
+def convert(x, block_sizes, settings):
+    converter = StreamingConverter(FS, test_sets[3], settings=settings)
+    events = []
+    first = 0
+    for size in block_sizes:
+        events.extend(converter.process(x[first:first + size]))
+        first += size
+    events.extend(converter.process(x[first:]))
+    return events + converter.flush()
+
+
+@pytest.mark.parametrize("settings", [StftSettings(window='hamming', fft_size=4096, window_size=2047, hop_size=512),
+                                      StftSettings(window='hamming', fft_size=1024, window_size=801, hop_size=1000)])
+def test_events_do_not_depend_on_block_size(settings):
+    x = tones()
+    whole = convert(x, [], settings)
+    assert len(whole) > 0
+    assert convert(x, [1] * 3000 + [7, 4096, 10000], settings) == whole
+    rng = np.random.default_rng(1)
+    assert convert(x, rng.integers(0, 5000, size=40).tolist(), settings) == whole